@@ -0,0 +1,7 @@
+def open_capture(filename, lowest_layer=None, filter=None, raw=False):
+	"""
+	Shortcut for pypacker.capture.open_capture(). The capture module (and ppcap, pcapng)
+	is imported on first call to keep "import pypacker.xxx" lightweight.
+	"""
+	from pypacker.capture import open_capture
+	return open_capture(filename, lowest_layer=lowest_layer, filter=filter, raw=raw)
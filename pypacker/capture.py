@@ -0,0 +1,198 @@
+"""
+Reading pcap and pcapng files (also gzip, xz or bzip2 compressed) using a common interface.
+The file format and the lowest layer are detected automatically, see open_capture().
+"""
+from pypacker import ppcap
+from pypacker import pcapng
+
+import logging
+
+logger = logging.getLogger("pypacker")
+
+FORMAT_PCAP		= "pcap"
+FORMAT_PCAPNG		= "pcapng"
+
+_PCAPNG_MAGIC = b"\x0a\x0d\x0d\x0a"
+_PCAP_MAGICS = set()
+
+for _magic in (ppcap.TCPDUMP_MAGIC, ppcap.TCPDUMP_MAGIC_NANO):
+	_PCAP_MAGICS.add(_magic.to_bytes(4, "big"))
+	_PCAP_MAGICS.add(_magic.to_bytes(4, "little"))
+
+# linktype -> lowest layer class, see get_lowest_layer()
+_lowest_layers = None
+
+
+def _ip_raw(buf):
+	"""Create IP or IP6 packets depending on the version field, used for raw IP linktypes."""
+	if buf[0] >> 4 == 6:
+		return _lowest_layers[ppcap.DLT_IPV6](buf)
+	return _lowest_layers[ppcap.DLT_IPV4](buf)
+
+
+def get_lowest_layer(linktype):
+	"""
+	linktype -- linktype of a pcap file header or a pcapng interface, ppcap.DLT_XXX
+	return -- class (or callable) to create the lowest layer packet from bytes, None if unknown
+	"""
+	global _lowest_layers
+
+	if _lowest_layers is None:
+		# load layers on first usage: importing all of them is not needed for plain file access
+		from pypacker.layer12 import can, ethernet, ieee80211, linuxcc, prism, radiotap
+		from pypacker.layer3 import ip, ip6
+
+		_lowest_layers = {
+			ppcap.DLT_EN10MB: ethernet.Ethernet,
+			ppcap.DLT_IEEE802_11: ieee80211.IEEE80211,
+			ppcap.DLT_IEEE802_11_RADIO: radiotap.Radiotap,
+			ppcap.DLT_PRISM_HEADER: prism.Prism,
+			ppcap.DLT_LINUX_SLL: linuxcc.LinuxCC,
+			ppcap.DLT_CAN_SOCKETCAN: can.CAN,
+			ppcap.DLT_IPV4: ip.IP,
+			ppcap.DLT_IPV6: ip6.IP6,
+			ppcap.DLT_RAW: _ip_raw,
+			ppcap.LINKTYPE_RAW: _ip_raw
+		}
+	return _lowest_layers.get(linktype, None)
+
+
+def _read_header(filename):
+	"""
+	return -- (FORMAT_XXX, ppcap.COMPRESSION_XXX or None, first 24 bytes of the uncompressed file)
+	"""
+	with open(filename, "rb") as fh:
+		buf = fh.read(24)
+	compression = ppcap.get_compression(buf)
+
+	if compression is not None:
+		with ppcap.open_compressed(filename, compression, threaded=False) as fh:
+			buf = fh.read(24)
+	magic = buf[:4]
+
+	if magic == _PCAPNG_MAGIC:
+		return FORMAT_PCAPNG, compression, buf
+	elif magic in _PCAP_MAGICS:
+		return FORMAT_PCAP, compression, buf
+	raise ValueError("unknown capture file format, magic: %r" % magic)
+
+
+def get_format(filename):
+	"""
+	filename -- name of a pcap or pcapng file, can be compressed
+	return -- (FORMAT_XXX, ppcap.COMPRESSION_XXX or None)
+	"""
+	return _read_header(filename)[:2]
+
+
+class Capture(object):
+	"""
+	pcap or pcapng file, see open_capture(). Iterating returns (timestamp_nanoseconds, packet)
+	for both formats. Timestamps of pcapng Simple Packet Blocks are None.
+	"""
+	def __init__(self, filename, lowest_layer=None, filter=None, raw=False):
+		"""
+		filename -- name of a pcap or pcapng file, can be compressed
+		lowest_layer -- class used to create packets, detected by linktype if None. Packets
+			having an unknown linktype or which can't be created are returned as bytes.
+		filter -- only return packets for which filter(packet) returns True
+		raw -- return bytes instead of packets, lowest_layer and filter are ignored
+		"""
+		self.format, self.compression, buf = _read_header(filename)
+		self._lowest_layer = lowest_layer
+		self._filter = filter
+		self._raw = raw
+		logger.info("reading %s file %s" % (self.format, filename))
+
+		if self.format == FORMAT_PCAP:
+			if not raw and lowest_layer is None:
+				file_header = ppcap.FileHdr(buf)
+
+				if file_header.magic not in (ppcap.TCPDUMP_MAGIC, ppcap.TCPDUMP_MAGIC_NANO):
+					file_header = ppcap.LEFileHdr(buf)
+				lowest_layer = get_lowest_layer(file_header.linktype)
+
+				if lowest_layer is None:
+					logger.warning("no lowest layer for linktype %d, returning bytes" % file_header.linktype)
+			# The plain mode is used for uncompressed files: mmap and block mode were slower
+			# for local files, packets mode needs a bytes copy of mapped data anyway.
+			# Reader handles compression and reads compressed files in block mode.
+			if lowest_layer is not None and not raw:
+				self._reader = ppcap.Reader(filename=filename, lowest_layer=lowest_layer, filter=filter)
+			else:
+				self._reader = ppcap.Reader(filename=filename)
+		else:
+			if self.compression is not None:
+				fh = ppcap.open_compressed(filename, self.compression)
+			else:
+				fh = open(filename, "rb")
+			self._reader = pcapng.StreamReader(fileobj=fh)
+
+	def _get_linktype(self):
+		if self.format == FORMAT_PCAP:
+			return self._reader.file_header.linktype
+		interfaces = self._reader.interfaces
+		return interfaces[0].linktype if interfaces else None
+
+	# linktype of the pcap file or of the first interface of the current pcapng section,
+	# None if no interface was read until now
+	linktype = property(_get_linktype)
+
+	def _iter_pcapng_packets(self):
+		reader = self._reader
+		lowest_layer = self._lowest_layer
+		filter = self._filter
+		# linktype -> lowest layer
+		lowest_layers = {}
+
+		for ts, iface_id, bts in reader:
+			linktype = reader.interfaces[iface_id].linktype
+
+			try:
+				clz = lowest_layers[linktype]
+			except KeyError:
+				clz = lowest_layer if lowest_layer is not None else get_lowest_layer(linktype)
+				lowest_layers[linktype] = clz
+
+				if clz is None:
+					logger.warning("no lowest layer for linktype %d, returning bytes" % linktype)
+
+			if clz is None:
+				yield ts, bts
+				continue
+
+			try:
+				pkt = clz(bts)
+			except Exception as ex:
+				logger.exception(ex)
+				yield ts, bts
+				continue
+
+			if filter is None or filter(pkt):
+				yield ts, pkt
+
+	def __iter__(self):
+		"""
+		return -- iterator of (timestamp_nanoseconds, [bytes|packet])
+		"""
+		if self.format == FORMAT_PCAP:
+			return iter(self._reader)
+		elif self._raw:
+			return ((ts, bts) for ts, _, bts in self._reader)
+		return self._iter_pcapng_packets()
+
+	def close(self):
+		self._reader.close()
+
+
+def open_capture(filename, lowest_layer=None, filter=None, raw=False):
+	"""
+	Open a pcap or pcapng file detecting the format, compression and lowest layer automatically.
+
+	filename -- name of a pcap or pcapng file, can be compressed (gzip, xz, bzip2)
+	lowest_layer -- class used to create packets, detected by linktype if None
+	filter -- only return packets for which filter(packet) returns True
+	raw -- return bytes instead of packets
+	return -- Capture, iterating returns (timestamp_nanoseconds, [bytes|packet])
+	"""
+	return Capture(filename, lowest_layer=lowest_layer, filter=filter, raw=raw)
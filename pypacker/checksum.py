@@ -1,30 +1,74 @@
 import array
+import logging
+import os
 import socket
 import struct
+import sys
+import threading
+from itertools import accumulate
+
+try:
+	import numpy
+except ImportError:
+	# batch checksums fall back to pure Python
+	numpy = None
+
+logger = logging.getLogger("pypacker")
 
 # avoid references for performance reasons
 unpack = struct.unpack
 unpack_word_be = struct.Struct(">H").unpack
 array_call = array.array
 ntohs = socket.ntohs
+from_bytes = int.from_bytes
+BYTEORDER_NATIVE = sys.byteorder
 
 # TCP (RFC 793) and UDP (RFC 768) checksum
 
 
 def in_cksum_add(s, buf):
-	"""Add checksum value to the given value s."""
-	n = len(buf)
-	# logger.debug("buflen for checksum: %d" % n)
-	cnt = int(n / 2) * 2
-	# logger.debug("slicing at: %d, %s" % (cnt, type(cnt)))
-	a = array_call("H", buf[:cnt])
-	# logger.debug("2-byte values: %s" % a)
-	# logger.debug(buf[-1].to_bytes(1, byteorder='big'))
+	"""
+	Add checksum value of buf to the given value s. The returned value
+	is the one's complement sum of all 16 bit words in host byte order.
+	Odd length buffers get padded with a zero byte.
+
+	s -- the current sum
+	buf -- bytes to be added
+	return -- sum of s and the folded words of buf
+	"""
+	if len(buf) & 1:
+		buf = bytes(buf) + b"\x00"
+	# 2**16 is 1 (mod 0xFFFF): the remainder equals the folded sum of all words
+	v = from_bytes(buf, BYTEORDER_NATIVE)
+
+	if v == 0:
+		return s
+	v %= 0xFFFF
+	# a non zero sum never folds to zero
+	return s + (v if v != 0 else 0xFFFF)
 
-	if cnt != n:
-		#a.append(unpack_word_be( buf[-1].to_bytes(1, byteorder="big") + b"\x00" )[0])
-		a.append(unpack_word_be(buf[-1:] + b"\x00")[0])
-	return s + sum(a)
+
+def in_cksum_add_bufs(s, bufs):
+	"""
+	Same as in_cksum_add() but for multiple buffers which are handled
+	like they were concatenated. This avoids copying eg pseudoheader,
+	header and body just for checksumming.
+
+	s -- the current sum
+	bufs -- list or tuple of bytes
+	return -- sum of s and the folded words of all buffers
+	"""
+	odd = False
+
+	for buf in bufs:
+		if not odd:
+			s = in_cksum_add(s, buf)
+		else:
+			# buffer starts at odd offset: byte swapped sum
+			v = in_cksum_add(0, buf)
+			s += ((v << 8) | (v >> 8)) & 0xFFFF
+		odd ^= len(buf) & 1
+	return s
 
 
 def in_cksum_done(s):
@@ -37,10 +81,137 @@ def in_cksum_done(s):
 
 
 def in_cksum(buf):
-	"""Return computed Internet Protocol checksum."""
+	"""
+	Return computed Internet Protocol checksum.
+
+	buf -- bytes or list/tuple of bytes to be handled like concatenated
+	"""
+	if type(buf) in (list, tuple):
+		return in_cksum_done(in_cksum_add_bufs(0, buf))
 	return in_cksum_done(in_cksum_add(0, buf))
 
 
+def in_cksum_partial(buf):
+	"""
+	Return the folded but not complemented Internet checksum, eg the pseudoheader
+	sum stored in TCP/UDP headers for checksum offloading.
+
+	buf -- bytes or list/tuple of bytes to be handled like concatenated
+	"""
+	if type(buf) in (list, tuple):
+		s = in_cksum_add_bufs(0, buf)
+	else:
+		s = in_cksum_add(0, buf)
+	s = (s >> 16) + (s & 0xFFFF)
+	s += (s >> 16)
+	return ntohs(s & 0xFFFF)
+
+
+def _in_cksum_batch_python(bufs, offsets=None):
+	"""Pure Python variant of in_cksum_batch()."""
+	if offsets is not None:
+		buf = memoryview(bufs)
+		bufs = [buf[start: end] for start, end in offsets]
+	return [in_cksum_done(in_cksum_add(0, buf)) for buf in bufs]
+
+
+def _in_cksum_batch_numpy(bufs, offsets=None):
+	"""NumPy variant of in_cksum_batch(): all buffers are summed up via one reduceat() call."""
+	if offsets is not None:
+		buf = memoryview(bufs)
+		bufs = [buf[start: end] for start, end in offsets]
+	# pad every buffer to an even length so every buffer starts at an even offset
+	bufs_even = []
+	starts = []
+	start = 0
+
+	for buf in bufs:
+		if len(buf) & 1:
+			buf = bytes(buf) + b"\x00"
+		bufs_even.append(buf)
+		starts.append(start)
+		start += len(buf) >> 1
+
+	if len(starts) == 0:
+		return []
+	# additional zero word: start indices of empty buffers at the end stay valid
+	bufs_even.append(b"\x00\x00")
+	words = numpy.frombuffer(b"".join(bufs_even), dtype=">u2")
+	starts = numpy.array(starts, dtype=numpy.int64)
+	lengths = numpy.diff(starts, append=start)
+	sums = numpy.add.reduceat(words, starts, dtype=numpy.uint64)
+	# reduceat() returns the word at the start index for empty buffers
+	sums[lengths == 0] = 0
+
+	# fold up to 48 bit sums to 16 bit
+	for _ in range(3):
+		sums = (sums & 0xFFFF) + (sums >> 16)
+	return (~sums & 0xFFFF).tolist()
+
+
+def in_cksum_batch(bufs, offsets=None):
+	"""
+	Return Internet checksums of multiple buffers at once. NumPy is used if available.
+
+	bufs -- list of bytes or one buffer if offsets is given
+	offsets -- list of (start, end) tuples (end exclusive) within bufs
+	return -- list of checksums, same as calling in_cksum() for every buffer
+	"""
+	if numpy is None:
+		return _in_cksum_batch_python(bufs, offsets)
+	return _in_cksum_batch_numpy(bufs, offsets)
+
+
+# Checksum offloading like done by NICs on sending, see set_offload()
+OFFLOAD_NONE		= 0
+OFFLOAD_SKIP		= 1
+OFFLOAD_PARTIAL		= 2
+
+offload_mode = OFFLOAD_NONE
+# mode overriding offload_mode for the current thread, see set_offload_thread()
+_offload_thread = threading.local()
+
+
+def get_offload():
+	"""
+	return -- checksum offloading mode of the current thread if set via set_offload_thread(),
+		the process wide mode otherwise
+	"""
+	mode = getattr(_offload_thread, "mode", None)
+	return offload_mode if mode is None else mode
+
+
+def set_offload(mode):
+	"""
+	Set checksum offloading mode for IP, TCP, UDP and SCTP used on calling bin().
+	This is a process wide setting, see set_offload_thread() and SocketHndl for
+	settings not affecting other threads.
+
+	mode -- one of the following:
+		OFFLOAD_NONE: calculate checksums (default)
+		OFFLOAD_SKIP: don't calculate checksums at all, they are left untouched
+		OFFLOAD_PARTIAL: TCP/UDP only store the pseudoheader sum (CHECKSUM_PARTIAL),
+			IP checksums are still calculated, SCTP checksums are left untouched
+	return -- the former mode
+	"""
+	global offload_mode
+	mode_old = offload_mode
+	offload_mode = mode
+	return mode_old
+
+
+def set_offload_thread(mode):
+	"""
+	Set checksum offloading mode for the current thread only, see set_offload().
+
+	mode -- OFFLOAD_XXX or None to use the process wide mode
+	return -- the former mode of this thread, None if not set
+	"""
+	mode_old = getattr(_offload_thread, "mode", None)
+	_offload_thread.mode = mode
+	return mode_old
+
+
 # CRC-32C Checksum
 # http://tools.ietf.org/html/rfc3309
 
@@ -100,16 +271,101 @@ crc32c_table = (
 )
 
 
-def crc32_add(crc, buf):
-	# buf = array.array("B", buf)
-	i = 0
-	while i < len(buf):
-		# crc = (crc >> 8) ^ crc32c_table[(crc ^ b) & 0xFF]
-		crc = (crc >> 8) ^ crc32c_table[(crc ^ buf[i]) & 0xFF]
-		i += 1
+def _crc32c_tables_create(amount):
+	"""
+	Create tables for slicing-by-N based on crc32c_table.
+
+	amount -- amount of tables to create
+	return -- list of tables, index 0 is crc32c_table
+	"""
+	tables = [crc32c_table]
+
+	for _ in range(amount - 1):
+		table_prev = tables[-1]
+		tables.append(tuple([(v >> 8) ^ crc32c_table[v & 0xFF] for v in table_prev]))
+	return tables
+
+
+crc32c_tables = _crc32c_tables_create(8)
+iter_unpack_crc32_4 = struct.Struct("<I").iter_unpack
+iter_unpack_crc32_8 = struct.Struct("<II").iter_unpack
+
+
+def crc32_add_bytewise(crc, buf):
+	"""
+	Add buf to the CRC-32c value crc, one byte per iteration.
+
+	crc -- the current CRC value, initially 0xFFFFFFFF
+	buf -- bytes to be added
+	return -- updated CRC value
+	"""
+	table = crc32c_table
+
+	for b in buf:
+		crc = (crc >> 8) ^ table[(crc ^ b) & 0xFF]
+	return crc
+
+
+def crc32_add_slice4(crc, buf):
+	"""Same as crc32_add_bytewise() but handles 4 bytes per iteration (slicing-by-4)."""
+	t0, t1, t2, t3 = crc32c_tables[:4]
+	cnt = len(buf) & ~3
+
+	for v, in iter_unpack_crc32_4(memoryview(buf)[:cnt]):
+		v ^= crc
+		crc = t3[v & 0xFF] ^ t2[(v >> 8) & 0xFF] ^ t1[(v >> 16) & 0xFF] ^ t0[v >> 24]
+
+	for b in buf[cnt:]:
+		crc = (crc >> 8) ^ t0[(crc ^ b) & 0xFF]
+	return crc
+
+
+def crc32_add_slice8(crc, buf):
+	"""Same as crc32_add_bytewise() but handles 8 bytes per iteration (slicing-by-8)."""
+	t0, t1, t2, t3, t4, t5, t6, t7 = crc32c_tables
+	cnt = len(buf) & ~7
+
+	for lo, hi in iter_unpack_crc32_8(memoryview(buf)[:cnt]):
+		lo ^= crc
+		crc = t7[lo & 0xFF] ^ t6[(lo >> 8) & 0xFF] ^ t5[(lo >> 16) & 0xFF] ^ t4[lo >> 24] ^\
+			t3[hi & 0xFF] ^ t2[(hi >> 8) & 0xFF] ^ t1[(hi >> 16) & 0xFF] ^ t0[hi >> 24]
+
+	for b in buf[cnt:]:
+		crc = (crc >> 8) ^ t0[(crc ^ b) & 0xFF]
 	return crc
 
 
+CRC32_IMPLEMENTATIONS = {
+	"bytewise": crc32_add_bytewise,
+	"slice4": crc32_add_slice4,
+	"slice8": crc32_add_slice8
+}
+
+
+def set_crc32_implementation(name):
+	"""
+	Select the implementation used by crc32_add() and crc32_cksum().
+	The default can be set via the environment variable PYPACKER_CRC32C
+	before importing this module.
+
+	name -- one of "bytewise", "slice4", "slice8"
+	"""
+	global crc32_add
+
+	try:
+		crc32_add = CRC32_IMPLEMENTATIONS[name]
+	except KeyError:
+		raise ValueError("unknown CRC32 implementation %r, allowed values: %s" %
+			(name, ", ".join(sorted(CRC32_IMPLEMENTATIONS))))
+
+
+try:
+	set_crc32_implementation(os.environ.get("PYPACKER_CRC32C", "slice8"))
+except ValueError as ex:
+	logger.warning("PYPACKER_CRC32C: %s, using slice8" % ex)
+	set_crc32_implementation("slice8")
+
+
 def crc32_done(crc):
 	tmp = ~crc & 0xFFFFFFFF
 	b0 = tmp & 0xFF
@@ -121,30 +377,46 @@ def crc32_done(crc):
 
 
 def crc32_cksum(buf):
-	"""Return computed CRC-32c checksum."""
+	"""
+	Return computed CRC-32c checksum.
+
+	buf -- bytes or list/tuple of bytes to be handled like concatenated
+	"""
+	if type(buf) in (list, tuple):
+		crc = 0xFFFFFFFF
+
+		for bts in buf:
+			crc = crc32_add(crc, bts)
+		return crc32_done(crc)
 	return crc32_done(crc32_add(0xFFFFFFFF, buf))
 
 
 def fletcher32(data_to_checksum, amount_words):
+	"""
+	Return computed Fletcher-32 checksum. Words are handled in blocks
+	of 359 words to avoid overflows in (non-Python) 32 bit implementations.
+
+	data_to_checksum -- bytes to be checksummed
+	amount_words -- amount of 16 bit words to be checksummed
+	"""
 	# 1 word = 2 Bytes
+	if amount_words * 2 > len(data_to_checksum):
+		raise ValueError("%d words to checksum but only %d bytes given" % (amount_words, len(data_to_checksum)))
 	sum1 = 0xFFFF
 	sum2 = 0xFFFF
+	words = array_call("H", data_to_checksum[: amount_words * 2])
+
+	if BYTEORDER_NATIVE == "little":
+		words.byteswap()
 	datapos = 0
 
-	while amount_words > 0:
-		tlen = 359 if amount_words > 359 else amount_words
-		amount_words -= tlen
-
-		while tlen > 0:
-			# sum1 += unpack_word_be(data_to_checksum[datapos:datapos+2])[0]
-			# print("%d" % sum1)
-			sum1 += unpack_word_be(data_to_checksum[datapos: datapos + 2])[0]
-			datapos += 2
-			sum2 += sum1
-			# print("%d" % sum1)
-			# print("%d" % sum2)
-			# print("--")
-			tlen -= 1
+	while datapos < amount_words:
+		block = words[datapos: datapos + 359]
+		tlen = len(block)
+		datapos += tlen
+		# every word w_i is added (tlen - i) times to sum2 = sum of all prefix sums
+		sum2 += tlen * sum1 + sum(accumulate(block))
+		sum1 += sum(block)
 		sum1 = (sum1 & 0xFFFF) + (sum1 >> 16)
 		sum2 = (sum2 & 0xFFFF) + (sum2 >> 16)
 	# Second reduction step to reduce sums to 16 bits
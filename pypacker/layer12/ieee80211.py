@@ -99,6 +99,106 @@ for subfield_name, mask_off in _FRAMECTRL_SUBHEADERDATA.items():
 	_subheader_properties.append(subheader)
 
 
+#
+# IE index for Mgmt-Frames: avoids creating IE packets just to read eg the SSID
+#
+IE_ID_VENDOR		= 221
+
+
+def _index_ies(buf):
+	"""
+	Index IEs in one pass over the raw bytes without creating any IE packets.
+
+	buf -- raw IE bytes as found in TriggerList "params"
+	return -- dict {ie_id | (IE_ID_VENDOR, oui): (value_offset, value_length)}, first occurrence wins
+	"""
+	index = {}
+	off = 0
+	buflen = len(buf)
+
+	while off + 1 < buflen:
+		ie_id = buf[off]
+		dlen = buf[off + 1]
+
+		if ie_id == IE_ID_VENDOR and dlen >= 3:
+			key = (ie_id, buf[off + 2: off + 5])
+		else:
+			key = ie_id
+
+		if key not in index:
+			index[key] = (off + 2, dlen)
+		off += 2 + dlen
+
+	return index
+
+
+class _IEAccess(object):
+	"""
+	Mixin for Mgmt-Frames having IEs in TriggerList "params": access IEs via an index
+	instead of dissecting "params".
+	"""
+	_ie_index_cached = None
+
+	def _get_ie_buf(self):
+		params = self._params
+
+		if type(params) is list:
+			# TriggerList not yet initiated: [b"bytes", callback]
+			return params[0]
+		return params.bin()
+
+	def _get_ie_index(self):
+		"""
+		return -- IE index, see _index_ies(). The index is rebuilt if "params" changed.
+		"""
+		buf = self._get_ie_buf()
+		index_cached = self._ie_index_cached
+
+		if index_cached is None or index_cached[0] is not buf:
+			index_cached = (buf, _index_ies(buf))
+			self._ie_index_cached = index_cached
+
+		return index_cached[1]
+
+	def get_ie(self, ie_id, oui=None):
+		"""
+		Get the value of the first IE having the given id without dissecting "params".
+
+		ie_id -- IE id like IEEE80211.IE_SSID
+		oui -- 3 bytes OUI to select a vendor specific IE (id 221) like b"\x00\x50\xf2"
+		return -- value bytes of the IE (excluding id and length) or None if not found
+		"""
+		try:
+			off, dlen = self._get_ie_index()[ie_id if oui is None else (ie_id, oui)]
+		except KeyError:
+			return None
+		return self._get_ie_buf()[off: off + dlen]
+
+	def _get_ssid(self):
+		return self.get_ie(IEEE80211.IE_SSID)
+
+	def _get_channel(self):
+		ds = self.get_ie(IEEE80211.IE_DS)
+		return ds[0] if ds else None
+
+	def _get_tim(self):
+		try:
+			off, dlen = self._get_ie_index()[IEEE80211.IE_TIM]
+		except KeyError:
+			return None
+		buf = self._get_ie_buf()
+
+		# truncated TIM: count, period and ctrl are needed
+		if dlen < 4 or len(buf) < off + 4:
+			return None
+		return IEEE80211.TIM(buf[off - 2: off + dlen])
+
+	ie_index = property(_get_ie_index)
+	ssid = property(_get_ssid)
+	channel = property(_get_channel)
+	tim = property(_get_tim)
+
+
 class IEEE80211(pypacker.Packet):
 	__hdr__ = (
 		# AAAABBCC | 00000000
@@ -120,7 +220,7 @@ class IEEE80211(pypacker.Packet):
 	#
 	# mgmt frames
 	#
-	class Beacon(pypacker.Packet):
+	class Beacon(_IEAccess, pypacker.Packet):
 		__hdr__ = (
 			("dst", "6s", b"\x00" * 6),
 			("src", "6s", b"\x00" * 6),
@@ -212,7 +312,7 @@ class IEEE80211(pypacker.Packet):
 		def reverse_address(self):
 			self.dst, self.src = self.src, self.dst
 
-	class ProbeReq(pypacker.Packet):
+	class ProbeReq(_IEAccess, pypacker.Packet):
 		__hdr__ = (
 			("dst", "6s", b"\x00" * 6),
 			("bssid", "6s", b"\x00" * 6),
@@ -243,7 +343,7 @@ class IEEE80211(pypacker.Packet):
 	class ProbeResp(Beacon):
 		pass
 
-	class AssocReq(pypacker.Packet):
+	class AssocReq(_IEAccess, pypacker.Packet):
 		__hdr__ = (
 			("dst", "6s", b"\x00" * 6),
 			("bssid", "6s", b"\x00" * 6),
@@ -273,7 +373,7 @@ class IEEE80211(pypacker.Packet):
 		def reverse_address(self):
 			self.dst, self.src = self.src, self.dst
 
-	class AssocResp(pypacker.Packet):
+	class AssocResp(_IEAccess, pypacker.Packet):
 		__hdr__ = (
 			("dst", "6s", b"\x00" * 6),
 			("bssid", "6s", b"\x00" * 6),
@@ -7,10 +7,16 @@ logger = logging.getLogger("pypacker")
 
 # avoid references for performance reasons
 unpack_flags = struct.Struct(">I").unpack
+pack_flags = struct.Struct(">I").pack
 unpack_hdr_len = struct.Struct("<H").unpack
 unpack_H_be = struct.Struct(">H").unpack
 unpack_H_le = struct.Struct("<H").unpack
 unpack_B = struct.Struct(">B").unpack
+unpack_from_B = struct.Struct("B").unpack_from
+unpack_from_b = struct.Struct("b").unpack_from
+unpack_from_H_le = struct.Struct("<H").unpack_from
+unpack_from_HH_le_flags = struct.Struct("<2xH").unpack_from
+unpack_from_Q_le = struct.Struct("<Q").unpack_from
 
 RTAP_TYPE_80211 = 0
 
@@ -126,6 +132,78 @@ def get_channelinfo(channel_bytes):
 	return [unpack_H_le(channel_bytes[0:2])[0], unpack_H_le(channel_bytes[2:4])[0]]
 
 
+# present flags (raw bytes incl. extended bitmaps) -> fields table, see _get_fields_table()
+_FIELDS_TABLE_CACHE = {}
+# avoid unbounded growth on garbage input
+_FIELDS_TABLE_CACHE_MAX = 256
+
+
+def _get_fields_table(buf):
+	"""
+	Get offsets of all fields stated by the present flags. Tables are cached per
+	present flags as they rarely change in a capture.
+
+	buf -- radiotap bytes starting at present flags (offset 4)
+	return -- ([(mask, offset_start_incl_padding, offset_end), ...], {mask: offset_data}),
+		offsets are relative to the start of the radiotap header
+	"""
+	end = 4
+
+	# skip extended present bitmaps: EXT-bit is the highest bit of the last byte (little endian)
+	while buf[end - 1] & 0x80 != 0:
+		end += 4
+
+	key = buf[:end]
+
+	try:
+		return _FIELDS_TABLE_CACHE[key]
+	except KeyError:
+		pass
+
+	present_flags = unpack_flags(key[:4])[0]
+	fields = []
+	offsets = {}
+	# extended bitmaps get assigned to the first field as padding
+	off_start = 8
+	off = 4 + end
+
+	# assume order of flags is correctly stated by "present_flags"
+	for mask in RADIO_FIELDS_MASKS:
+		if mask & present_flags == 0:
+			continue
+
+		size, align = RADIO_FIELDS[mask]
+		# alignment is relative to the start of the radiotap header
+		off += (align - off % align) % align
+		offsets[mask] = off
+		off += size
+		fields.append((mask, off_start, off))
+		off_start = off
+
+	if len(_FIELDS_TABLE_CACHE) >= _FIELDS_TABLE_CACHE_MAX:
+		_FIELDS_TABLE_CACHE.clear()
+
+	table = (fields, offsets)
+	_FIELDS_TABLE_CACHE[key] = table
+	return table
+
+
+def get_ieee80211_type_subtype(buf):
+	"""
+	Read 802.11 type/subtype from raw radiotap bytes without creating any packets.
+
+	buf -- radiotap bytes including the 802.11 frame
+	return -- (type, subtype) eg (ieee80211.MGMT_TYPE, ieee80211.M_BEACON) or None if no frame is present
+	"""
+	hdr_len = unpack_hdr_len(buf[2:4])[0]
+
+	if len(buf) <= hdr_len:
+		return None
+
+	framectl = buf[hdr_len]
+	return ((framectl >> 2) & 0x3, framectl >> 4)
+
+
 class Radiotap(pypacker.Packet):
 	__hdr__ = (
 		("version", "B", 0),
@@ -147,19 +225,63 @@ class Radiotap(pypacker.Packet):
 
 	fcs = property(__get_fcs, __set_fcs)
 
+	def _get_field_value(self, mask, unpack_cb):
+		"""
+		Read a field value directly from the header bytes.
+
+		mask -- XXX_MASK of the field
+		unpack_cb -- unpack_from-callback to extract the value
+		return -- unpacked field value or None if field is not present
+		"""
+		hdr = self.header_bytes
+
+		try:
+			off = _get_fields_table(hdr[4:])[1][mask]
+		except KeyError:
+			return None
+		return unpack_cb(hdr, off)[0]
+
+	# TSFT in microseconds
+	tsft = property(lambda obj: obj._get_field_value(TSFT_MASK, unpack_from_Q_le))
+	# rate in 500 kbps
+	rate = property(lambda obj: obj._get_field_value(RATE_MASK, unpack_from_B))
+	# channel frequency in MHz
+	channel_freq = property(lambda obj: obj._get_field_value(CHANNEL_MASK, unpack_from_H_le))
+	channel_flags = property(lambda obj: obj._get_field_value(CHANNEL_MASK, unpack_from_HH_le_flags))
+	# antenna signal/noise in dBm
+	dbm_antsignal = property(lambda obj: obj._get_field_value(DB_ANT_SIG_MASK, unpack_from_b))
+	dbm_antnoise = property(lambda obj: obj._get_field_value(DB_ANT_NOISE_MASK, unpack_from_b))
+
+	def _get_ieee80211_type_subtype(self):
+		if self._lazy_handler_data is not None:
+			buf = self._lazy_handler_data[2]
+		elif self._bodytypename is not None:
+			# handler already parsed
+			hndl = self._get_bodyhandler()
+			return (hndl.type, hndl.subtype)
+		else:
+			buf = self._body_bytes
+
+		if len(buf) == 0:
+			return None
+		return ((buf[0] >> 2) & 0x3, buf[0] >> 4)
+
+	# (type, subtype) of the 802.11 frame without dissecting it, None if not present
+	ieee80211_type_subtype = property(_get_ieee80211_type_subtype)
+
 	def _dissect(self, buf):
-		flags = self._present_flags = unpack_flags(buf[4:8])[0]
 		pos_end = len(buf)
 
-		if flags & FLAGS_MASK == FLAGS_MASK:
-			off = 0
+		try:
+			off = _get_fields_table(buf[4:])[1][FLAGS_MASK]
 
-			if flags & TSFT_MASK == TSFT_MASK:
-				off = 8
 			if buf[off] & 0x10 != 0:
 				#logger.debug("fcs found")
 				self._fcs = buf[-4:]
 				pos_end = -4
+		except KeyError:
+			# no flags present
+			pass
 
 		hdr_len = unpack_hdr_len(buf[2:4])[0]
 		#logger.debug("hdr length is: %d" % hdr_len)
@@ -171,39 +293,9 @@ class Radiotap(pypacker.Packet):
 		return hdr_len
 
 	def _parse_flags(self, buf):
-		off = 0
-		flags = []
-
-		# assume order of flags is correctly stated by "present_flags"
-		# we need to know if fcs is present: minimum TSFT and flags must get parsed
-		for mask in RADIO_FIELDS_MASKS:
-			#logger.debug(self.present_flags)
-			# flag not set
-			if mask & self.present_flags == 0:
-				continue
-
-			size_align = RADIO_FIELDS[mask]
-			size = size_align[0]
-			# check alignment
-			mod = off % size_align[1]
-
-			if mod != 0:
-				# enlarge size by alignment
-				size += (size_align[1] - mod)
-
-			# logger.debug("got flag %02X, length/align: %r" % (mask, size_align))
-			# add all fields for the stated flag
-			value = buf[off: off + size]
-
-			# FCS present?
-			if mask == FLAGS_MASK and unpack_B(value)[0] & 0x10 != 0:
-				# logger.debug("fcs found")
-				fcs_present = True
-
-			#logger.debug("adding flag: %s" % str(mask))
-			flags.append((mask, value))
-			off += size
-		return flags
+		fields = _get_fields_table(pack_flags(self.present_flags) + buf)[0]
+		# add all fields for the stated flag including padding
+		return [(mask, buf[start - 8: end - 8]) for mask, start, end in fields]
 
 	def bin(self, update_auto_fields=True):
 		"""Custom bin(): handle FCS."""
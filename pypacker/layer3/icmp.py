@@ -86,10 +86,13 @@ class ICMP(pypacker.Packet):
 		if update_auto_fields and self.sum_au_active and self._changed():
 			# logger.debug("sum is: %d" % self.sum)
 			self.sum = 0
-			self.sum = checksum.in_cksum(self._pack_header() + self.body_bytes)
+			self.sum = checksum.in_cksum((self._pack_header(), self.body_bytes))
 			# logger.debug("sum is: %d" % self.sum)
 		return pypacker.Packet.bin(self, update_auto_fields=update_auto_fields)
 
+	def _verify_sum(self):
+		return checksum.in_cksum((self._pack_header(), self.body_bytes)) == 0
+
 	def _dissect(self, buf):
 		# logger.debug("ICMP: adding fields for type: %d" % buf[0])
 		self._init_handler(buf[0], buf[4:])
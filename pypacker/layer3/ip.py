@@ -204,7 +204,7 @@ class IP(pypacker.Packet):
 				# logger.debug("updating: %r" % self._packet)
 					# options length need to be multiple of 4 Bytes
 				self.hl = int(self.header_len / 4) & 0xf
-			if self.sum_au_active:
+			if self.sum_au_active and checksum.get_offload() != checksum.OFFLOAD_SKIP:
 				# length changed so we have to recalculate checksum
 				# logger.debug(">>> IP: calculating sum")
 				# reset checksum for recalculation,  mark as changed / clear cache
@@ -216,6 +216,10 @@ class IP(pypacker.Packet):
 
 		return pypacker.Packet.bin(self, update_auto_fields=update_auto_fields)
 
+	def _verify_sum(self):
+		# checksum over the header including the checksum itself is zero
+		return in_cksum(self._pack_header()) == 0
+
 	def direction(self, other):
 		# logger.debug("checking direction: %s<->%s" % (self, next))
 		# TODO: handle broadcast
@@ -29,6 +29,19 @@ ext_hdrs = set([
 	])
 
 
+def get_ext_hdr_len(type_ext, len_field):
+	"""
+	type_ext -- extension header type
+	len_field -- value of the length field of the extension header (2nd byte)
+	return -- length of the extension header in bytes
+	"""
+	if type_ext == IP_PROTO_AH:
+		# AH: 4 octet units, not including the first 2 units
+		return (len_field + 2) * 4
+	# fragment header: length field is reserved and 0 -> 8 bytes
+	return 8 + len_field * 8
+
+
 class IP6(pypacker.Packet):
 	__hdr__ = (
 		("v_fc_flow", "I", 0x60000000),
@@ -68,25 +81,40 @@ class IP6(pypacker.Packet):
 	def _dissect(self, buf):
 		type_nxt = buf[6]
 		off = 40
-		opts = []
 
 		# logger.debug("parsing opts from bytes (dst: %s): (len: %d) %s" % (buf[24:40], self.hdr_len, buf[off:]))
-		# parse options until type is an upper layer one
-		while type_nxt in ext_hdrs:
-			length = 8 + buf[off + 1] * 8
-			# logger.debug("next type is: %s, len: %d, %r" % (type_nxt, length, buf[off:off + length]))
-			opt = ext_hdrs_cls[type_nxt](buf[off:off + length])
-			opts.append(opt)
+		# skip extension headers until type is an upper layer one: only read next header/length
+		# ESP is treated as upper layer: everything after it is encrypted
+		while type_nxt in ext_hdrs and type_nxt != IP_PROTO_ESP:
+			# logger.debug("next type is: %s, len: %d" % (type_nxt, get_ext_hdr_len(type_nxt, buf[off + 1])))
+			length = get_ext_hdr_len(type_nxt, buf[off + 1])
 			type_nxt = buf[off]
 			off += length
 
-		# TODO: lazy dissect possible?
-		self.opts.extend(opts)
+		type_first = buf[6]
+		# extension headers get created on access
+		self._init_triggerlist("opts", buf[40: off], lambda bts: IP6._unpack_ext_hdrs(bts, type_first))
 		# IPv6 and IPv4 share same handler
 		self._init_handler(type_nxt, buf[off:])
-		# TODO: return length without parsing everything
 		return off
 
+	@staticmethod
+	def _unpack_ext_hdrs(buf, type_nxt):
+		"""
+		buf -- bytes of all extension headers
+		type_nxt -- type of the first extension header
+		return -- list of extension header packets
+		"""
+		off = 0
+		opts = []
+
+		while off < len(buf):
+			length = get_ext_hdr_len(type_nxt, buf[off + 1])
+			opts.append(ext_hdrs_cls[type_nxt](buf[off: off + length]))
+			type_nxt = buf[off]
+			off += length
+		return opts
+
 	def direction(self, other):
 		# logger.debug("checking direction: %s<->%s" % (self, next))
 		if self.src == other.src and self.dst == other.dst:
@@ -113,11 +141,16 @@ class IP6OptsHeader(pypacker.Packet):
 
 	def _dissect(self, buf):
 		length = 8 + buf[1] * 8
+		self._init_triggerlist("opts", buf[2: length], IP6OptsHeader._unpack_opts)
+		return length
+
+	@staticmethod
+	def _unpack_opts(buf):
 		options = []
-		off = 2
+		off = 0
 
 		# TODO: check https://code.google.com/p/pypacker/issues/attachmentText?id=72
-		while off < length:
+		while off < len(buf):
 			opt_type = buf[off]
 			# logger.debug("IP6OptsHeader: type: %d" % opt_type)
 
@@ -134,8 +167,7 @@ class IP6OptsHeader(pypacker.Packet):
 				off += 2 + opt_len
 			options.append(opt)
 
-		self.opts.extend(options)
-		return off
+		return options
 
 
 class IP6Option(pypacker.Packet):
@@ -175,21 +207,14 @@ class IP6RoutingHeader(pypacker.Packet):
 	sl_bits = property(__get_sl_bits, __set_sl_bits)
 
 	def _dissect(self, buf):
-		hdr_size = 8
-		addr_size = 16
-		addresses = []
-		num_addresses = self.buf[1] / 2
-
-		buf = buf[hdr_size:hdr_size + num_addresses * addr_size]
-
+		length = 8 + buf[1] * 8
 		# logger.debug("IP6RoutingHeader: parsing addresses")
-		for i in range(num_addresses):
-			addresses.append(buf[i * addr_size: i * addr_size + addr_size])
+		self._init_triggerlist("addresses", buf[8: length], IP6RoutingHeader._unpack_addresses)
+		return length
 
-		self.addresses.extend(addresses)
-		return len(num_addresses) * addr_size + addr_size
-		# setattr(self, "addresses", addresses)
-		# setattr(self, "length", self.len * 8 + 8)
+	@staticmethod
+	def _unpack_addresses(buf):
+		return [buf[off: off + 16] for off in range(0, len(buf), 16)]
 
 
 class IP6FragmentHeader(pypacker.Packet):
@@ -233,7 +258,7 @@ class IP6ESPHeader(pypacker.Packet):
 class IP6DstOptsHeader(IP6OptsHeader):
 	def _dissect(self, buf):
 		# logger.debug("IP6DstOptsHeader parsing")
-		IP6OptsHeader._dissect(self, buf)
+		return IP6OptsHeader._dissect(self, buf)
 
 ext_hdrs_cls = {
 		IP_PROTO_HOPOPTS: IP6HopOptsHeader,
@@ -2,6 +2,9 @@
 Stream Control Transmission Protocol.
 http://tools.ietf.org/html/rfc3286
 http://tools.ietf.org/html/rfc2960
+
+Payloads of DATA chunks are dispatched by their PPID, eg sctp.chunks[0][diameter.Diameter].
+SCTP itself has no upper layer as a packet can bundle multiple DATA chunks.
 """
 
 from pypacker import pypacker, triggerlist, checksum
@@ -34,7 +37,16 @@ CWR			= 13
 SHUTDOWN_COMPLETE	= 14
 
 
+# Payload Protocol Identifiers (DATA chunks)
+PPID_UNSPECIFIED	= 0
+PPID_M3UA		= 3
+PPID_H248		= 7
+PPID_DIAMETER		= 46
+PPID_DIAMETER_DTLS	= 47
+
+
 class Chunk(pypacker.Packet):
+	"""Generic chunk, value and padding are stored as body bytes."""
 	__hdr__ = (
 		("type", "B", INIT),
 		("flags", "B", 0),
@@ -42,6 +54,74 @@ class Chunk(pypacker.Packet):
 	)
 
 
+class DataChunk(pypacker.Packet):
+	"""DATA chunk, the payload is dispatched by PPID."""
+	__hdr__ = (
+		("type", "B", DATA),
+		("flags", "B", 0x03),	# beginning/ending fragment
+		("len", "H", 16, FIELD_FLAG_AUTOUPDATE),	# length of header + payload (without padding)
+		("tsn", "I", 0),
+		("stream_id", "H", 0),
+		("stream_seq", "H", 0),
+		("ppid", "I", PPID_UNSPECIFIED)
+	)
+
+	# handle padding attribute
+	def __get_padding(self):
+		try:
+			return self._padding
+		except AttributeError:
+			# pad to 4 bytes
+			return b"\x00" * (-self.len % 4)
+
+	def __set_padding(self, padding):
+		self._padding = padding
+	padding = property(__get_padding, __set_padding)
+
+	def _dissect(self, buf):
+		dlen = unpack_H(buf[2: 4])[0]
+		# last chunk can lack padding
+		self._padding = buf[dlen:]
+
+		if dlen > 16:
+			self._init_handler(unpack_I(buf[12: 16])[0], buf[16: dlen])
+		else:
+			# avoid padding becoming body bytes
+			self.body_bytes = b""
+		return 16
+
+	def bin(self, update_auto_fields=True):
+		if update_auto_fields and self.len_au_active and self._changed():
+			self.len = len(self)
+			self._padding = b"\x00" * (-self.len % 4)
+		return pypacker.Packet.bin(self, update_auto_fields=update_auto_fields) + self.padding
+
+
+def get_chunk_index(buf):
+	"""
+	Index chunks without creating any chunk packets.
+
+	buf -- bytes of all chunks
+	return -- [(chunk_type, offset, length_including_padding), ...]
+	"""
+	index = []
+	off = 0
+	blen = len(buf)
+
+	while off + 4 <= blen:
+		dlen = unpack_H(buf[off + 2: off + 4])[0]
+
+		if dlen < 4:
+			# invalid length, avoid endless loop
+			break
+		# chunks are padded to multiple of 4 bytes
+		dlen_padded = (dlen + 3) & ~3
+		index.append((buf[off], off, dlen_padded))
+		off += dlen_padded
+
+	return index
+
+
 class SCTP(pypacker.Packet):
 	__hdr__ = (
 		("sport", "H", 0),
@@ -51,7 +131,7 @@ class SCTP(pypacker.Packet):
 		("chunks", None, triggerlist.TriggerList)
 	)
 
-	# handle padding attribute
+	# handle padding attribute: bytes after the last chunk
 	def __get_padding(self):
 		try:
 			return self._padding
@@ -63,48 +143,58 @@ class SCTP(pypacker.Packet):
 	padding = property(__get_padding, __set_padding)
 
 	def _dissect(self, buf):
-		# parse chunks
-		chunks = []
+		# only find the end of the chunks: chunks get created on access
+		index = get_chunk_index(buf[12:])
 		off = 12
-		blen = len(buf)
-
-		# logger.debug("SCTP: parsing chunks")
-		chunktype = -1
-
-		# TODO: use lazy dissect
-		while off + 4 < blen:
-			dlen = unpack_H(buf[off + 2: off + 4])[0]
-			# check for padding (this should be a data chunk)
-			if off + dlen < blen:
-				self.padding = buf[off + dlen:]
-				# logger.debug("found padding: %s" % self.padding)
-
-			chunk = Chunk(buf[off: off + dlen])
-			# logger.debug("SCTP: Chunk; %s " % chunk)
-			chunks.append(chunk)
-
-			# get payload chunktype from DATA chunks
-			if chunk.type == 0:
-				chunktype = unpack_I(buf[off + chunk.header_len + 8: off + chunk.header_len + 8 + 4])[0]
-				# logger.debug("got DATA chunk, chunktype: %d" % chunktype)
-				# remove data from chunk: use bytes for handler
-				chunk.body_bytes = b""
-				off += len(chunk)
-				# assume DATA is the last chunk
-				break
-
-			off += dlen
-
-		# TODO: use lazy dissect, possible?
-		self.chunks.extend(chunks)
-
-		chunktype = unpack_H(buf[2: 4])[0]
-		self._init_handler(chunktype, buf[off:-len(self.padding)])
-		# TODO: return length wothout dissecting
+
+		if len(index) > 0:
+			# last chunk can lack padding
+			off = min(12 + index[-1][1] + index[-1][2], len(buf))
+
+		if off < len(buf):
+			self.padding = buf[off:]
+			# logger.debug("found padding: %s" % self.padding)
+			# padding is appended by bin(): don't keep it as body
+			self.body_bytes = b""
+
+		self._init_triggerlist("chunks", buf[12: off], SCTP._unpack_chunks)
 		return off
 
+	@staticmethod
+	def _unpack_chunks(buf):
+		chunks = []
+
+		for chunk_type, off, dlen in get_chunk_index(buf):
+			if chunk_type == DATA:
+				chunks.append(DataChunk(buf[off: off + dlen]))
+			else:
+				chunks.append(Chunk(buf[off: off + dlen]))
+		return chunks
+
+	def _get_chunk_index(self):
+		chunks = self._chunks
+
+		if type(chunks) is list:
+			# TriggerList not yet initiated: [b"bytes", callback]
+			return get_chunk_index(chunks[0])
+		return get_chunk_index(chunks.bin())
+
+	# [(chunk_type, offset, length), ...] without creating chunks
+	chunk_index = property(_get_chunk_index)
+
 	def bin(self, update_auto_fields=True):
-		if update_auto_fields and self.sum_au_active and self._changed():
+		chunks = self._chunks
+
+		if type(chunks) is not list:
+			# changes to upper layers of chunks (eg DATA payload) are not tracked by the TriggerList
+			for chunk in chunks:
+				# TriggerLists can also contain raw bytes and tuples
+				if isinstance(chunk, pypacker.Packet) and chunk._changed():
+					chunks._notify_change()
+					break
+
+		if update_auto_fields and self.sum_au_active and checksum.get_offload() == checksum.OFFLOAD_NONE and\
+			self._changed():
 			# logger.debug("updating checksum")
 			self._calc_sum()
 		return pypacker.Packet.bin(self, update_auto_fields=update_auto_fields) + self.padding
@@ -112,19 +202,16 @@ class SCTP(pypacker.Packet):
 	def _calc_sum(self):
 		# mark as changed
 		self.sum = 0
-		s = checksum.crc32_add(0xffffffff, self._pack_header())
-		padlen = len(self.padding)
-
-		if padlen == 0:
-			s = checksum.crc32_add(s, self.body_bytes)
-		else:
-			# logger.debug("checksum with padding")
-			s = checksum.crc32_add(s, self.body_bytes[:-padlen])
-
-		sum = checksum.crc32_done(s)
+		# chunks are part of the header, padding after the last chunk is ignored
+		sum = checksum.crc32_cksum((self._pack_header(), self.body_bytes))
 		# logger.debug("sum is: %d" % sum)
 		self.sum = sum
 
+	def _verify_sum(self):
+		hdr = self._pack_header()
+		# checksum is calculated using a zero value for the checksum field
+		return checksum.crc32_cksum((hdr[:8], b"\x00\x00\x00\x00", hdr[12:], self.body_bytes)) == self.sum
+
 	def direction(self, other):
 		# logger.debug("checking direction: %s<->%s" % (self, other))
 		if self.sport == other.sport and self.dport == other.dport:
@@ -141,8 +228,8 @@ class SCTP(pypacker.Packet):
 # load handler
 from pypacker.layer567 import diameter
 
-pypacker.Packet.load_handler(SCTP,
+pypacker.Packet.load_handler(DataChunk,
 				{
-					123: diameter.Diameter,
+					PPID_DIAMETER: diameter.Diameter,
 				}
 )
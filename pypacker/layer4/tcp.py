@@ -140,7 +140,7 @@ class TCP(pypacker.Packet):
 				# logger.debug("no lower layer found!")
 				update = False
 
-			if update and self.sum_au_active:
+			if update and self.sum_au_active and checksum.get_offload() != checksum.OFFLOAD_SKIP:
 				# logger.debug(">>> updating checksum")
 				self._calc_sum()
 
@@ -201,18 +201,23 @@ class TCP(pypacker.Packet):
 			self.sum = 0
 			# logger.debug("TCP sum recalc: IP=%d / %s / %s" % (len(src), src, dst))
 
-			tcp_bin = self.header_bytes + self.body_bytes
+			tcp_hdr, tcp_body = self.header_bytes, self.body_bytes
+			tcp_len = len(tcp_hdr) + len(tcp_body)
 			# IP-pseudoheader, check if version 4 or 6
 			if len(src) == 4:
-				s = pack_ipv4(src, dst, 6, len(tcp_bin))  # 6 = TCP
+				s = pack_ipv4(src, dst, 6, tcp_len)  # 6 = TCP
 			else:
-				s = pack_ipv6(src, dst, 6, len(tcp_bin))  # 6 = TCP
+				s = pack_ipv6(src, dst, 6, tcp_len)  # 6 = TCP
 
 			# Get checksum of concatenated pseudoheader+TCP packet
 			# logger.debug("pseudoheader: %r" % s)
 			# logger.debug("tcp_bin: %r" % tcp_bin)
 			# assign via non-shadowed variable to trigger re-packing
-			self.sum = checksum.in_cksum(s + tcp_bin)
+			if checksum.get_offload() == checksum.OFFLOAD_PARTIAL:
+				# NIC calculates the final checksum based on the pseudoheader sum
+				self.sum = checksum.in_cksum_partial(s)
+			else:
+				self.sum = checksum.in_cksum((s, tcp_hdr, tcp_body))
 			# logger.debug(">>> new checksum: %0X" % self._sum)
 		except Exception:
 			# not an IP packet as lower layer (src, dst not present) or invalid src/dst
@@ -232,6 +237,22 @@ class TCP(pypacker.Packet):
 		except:
 			return False
 
+	def _verify_sum(self):
+		try:
+			src, dst = self._lower_layer.src, self._lower_layer.dst
+		except AttributeError:
+			# not an IP packet as lower layer
+			return None
+
+		tcp_hdr, tcp_body = self._pack_header(), self.body_bytes
+		tcp_len = len(tcp_hdr) + len(tcp_body)
+
+		if len(src) == 4:
+			s = pack_ipv4(src, dst, 6, tcp_len)
+		else:
+			s = pack_ipv6(src, dst, 6, tcp_len)
+		return checksum.in_cksum((s, tcp_hdr, tcp_body)) == 0
+
 	def direction(self, other):
 		# logger.debug("checking direction: %s<->%s" % (self, other))
 		if self.sport == other.sport and self.dport == other.dport:
@@ -56,7 +56,7 @@ class UDP(pypacker.Packet):
 				# assume not an IP packet: we can't calculate the checksum
 				update = False
 
-			if update and self.sum_au_active:
+			if update and self.sum_au_active and checksum.get_offload() != checksum.OFFLOAD_SKIP:
 				self._calc_sum()
 
 		return pypacker.Packet.bin(self, update_auto_fields=update_auto_fields)
@@ -83,15 +83,21 @@ class UDP(pypacker.Packet):
 			src, dst = self._lower_layer.src, self._lower_layer.dst
 			# logger.debug(src + b" / "+ dst)
 			self.sum = 0
-			udp_bin = self.header_bytes + self.body_bytes
+			udp_hdr, udp_body = self.header_bytes, self.body_bytes
+			udp_len = len(udp_hdr) + len(udp_body)
 
 			# IP-pseudoheader, check if version 4 or 6
 			if len(src) == 4:
-				s = pack_ipv4(src, dst, 17, len(udp_bin))  # 17 = UDP
+				s = pack_ipv4(src, dst, 17, udp_len)  # 17 = UDP
 			else:
-				s = pack_ipv6(src, dst, 17, len(udp_bin))  # 17 = UDP
+				s = pack_ipv6(src, dst, 17, udp_len)  # 17 = UDP
 
-			csum = checksum.in_cksum(s + udp_bin)
+			if checksum.get_offload() == checksum.OFFLOAD_PARTIAL:
+				# NIC calculates the final checksum based on the pseudoheader sum
+				self.sum = checksum.in_cksum_partial(s)
+				return
+
+			csum = checksum.in_cksum((s, udp_hdr, udp_body))
 
 			if csum == 0:
 				csum = 0xffff    # RFC 768, p2
@@ -103,6 +109,26 @@ class UDP(pypacker.Packet):
 			# not an IP packet as lower layer (src, dst not present) or invalid src/dst
 			pass
 
+	def _verify_sum(self):
+		try:
+			src, dst = self._lower_layer.src, self._lower_layer.dst
+		except AttributeError:
+			# not an IP packet as lower layer
+			return None
+
+		if self.sum == 0 and len(src) == 4:
+			# no checksum used (IPv4 only)
+			return True
+
+		udp_hdr, udp_body = self._pack_header(), self.body_bytes
+		udp_len = len(udp_hdr) + len(udp_body)
+
+		if len(src) == 4:
+			s = pack_ipv4(src, dst, 17, udp_len)
+		else:
+			s = pack_ipv6(src, dst, 17, udp_len)
+		return checksum.in_cksum((s, udp_hdr, udp_body)) == 0
+
 	def direction(self, other):
 		# logger.debug("checking direction: %s<->%s" % (self, other))
 		if self.sport == other.sport and self.dport == other.dport:
@@ -97,6 +97,100 @@ DNS_HESIOD		= 4
 DNS_ANY			= 255
 
 
+# max amount of compression pointers to follow for one name
+_DNS_NAME_POINTERS_MAX	= 32
+
+
+def _get_name_end(buf, off):
+	"""
+	Find the end of a (possibly compressed) name without decoding it.
+
+	return -- offset after the name starting at buf[off]
+	"""
+	buflen = len(buf)
+
+	while off < buflen:
+		label_len = buf[off]
+
+		if label_len == 0:
+			return off + 1
+		elif label_len & 0xC0 == 0xC0:
+			# compression pointer ends name
+			return off + 2
+		off += label_len + 1
+	return buflen
+
+
+def dns_name_decompress(msg, off, cache=None, buf=None, _pointers=0):
+	"""
+	Resolve a (possibly compressed) DNS name.
+
+	msg -- the whole DNS message compression pointers refer to, can be None
+	off -- offset of the name in buf
+	cache -- dict {offset_in_msg: name} to be shared among all names of the message
+	buf -- buffer containing the name, defaults to msg
+	return -- name without compression pointers eg b"\x03www\x04test\x03com\x00"
+	"""
+	if buf is None:
+		buf = msg
+	is_msg = buf is msg and cache is not None
+
+	if is_msg:
+		try:
+			return cache[off]
+		except KeyError:
+			pass
+
+	off_start = off
+	labels = []
+
+	try:
+		while True:
+			label_len = buf[off]
+
+			if label_len == 0:
+				labels.append(b"\x00")
+				break
+			elif label_len & 0xC0 == 0xC0:
+				# pointer: resolve the rest of the name using the message
+				if msg is None or _pointers >= _DNS_NAME_POINTERS_MAX:
+					# unresolvable or pointer loop
+					break
+				off_ptr = (label_len & 0x3F) << 8 | buf[off + 1]
+				labels.append(dns_name_decompress(msg, off_ptr, cache=cache, _pointers=_pointers + 1))
+				break
+			labels.append(buf[off: off + label_len + 1])
+			off += label_len + 1
+	except IndexError:
+		# truncated name
+		pass
+
+	name = b"".join(labels)
+
+	if is_msg:
+		cache[off_start] = name
+	return name
+
+
+def _resolve_name(obj, name):
+	names = obj._dns_names
+
+	if names is None:
+		return dns_name_decompress(None, 0, buf=name)
+	return dns_name_decompress(names[0], 0, cache=names[1], buf=name)
+
+
+def get_property_dnsname_compressed(var):
+	"""
+	Create a get/set-property for a DNS name which can contain compression pointers.
+	Pointers get resolved using the DNS message the record was dissected from.
+	"""
+	return property(
+		lambda obj: pypacker.dns_name_decode(_resolve_name(obj, obj.__getattribute__(var))),
+		lambda obj, val: obj.__setattr__(var, pypacker.dns_name_encode(val))
+	)
+
+
 class DNS(pypacker.Packet):
 	__hdr__ = (
 		("id", "H", 0x1234),
@@ -119,19 +213,21 @@ class DNS(pypacker.Packet):
 			("cls", "H", DNS_IN)
 		)
 
-		name_s = pypacker.get_property_dnsname("name")
+		# (message, name cache) set by DNS to resolve compressed names
+		_dns_names = None
+		name_s = get_property_dnsname_compressed("name")
 
 		def _dissect(self, buf):
-			idx = buf.find(b"\x00")
-			#logger.debug("name in Query: %s" % buf[:idx+1])
-			self.name = buf[:idx + 1]
+			idx = _get_name_end(buf, 0)
+			#logger.debug("name in Query: %s" % buf[:idx])
+			self.name = buf[:idx]
 			#logger.debug("val / format: %s %s" % (self._name, self._name_format))
 			return len(buf)		# name (including 0) + type + cls
 
 	class Answer(pypacker.Packet):
 		"""DNS resource record."""
 		__hdr__ = (
-			("name", "H", 0xc00c),
+			("name", None, b"\xc0\x0c"),
 			("type", "H", DNS_A),
 			("cls", "H", DNS_IN),
 			("ttl", "I", 180),
@@ -139,17 +235,22 @@ class DNS(pypacker.Packet):
 			("address", None, b"1234")		# eg IPv4
 		)
 
+		_dns_names = None
+		name_s = get_property_dnsname_compressed("name")
+
 		def _dissect(self, buf):
 			# needed set format
-			addr_len = unpack_H(buf[10:12])[0]
-			self.address = buf[12:12 + addr_len]
+			idx = _get_name_end(buf, 0)
+			self.name = buf[:idx]
+			addr_len = unpack_H(buf[idx + 8: idx + 10])[0]
+			self.address = buf[idx + 10: idx + 10 + addr_len]
 			# logger.debug("address: %s" % self.address)
-			return 12 + addr_len
+			return idx + 10 + addr_len
 
 	class Auth(pypacker.Packet):
 		"""Auth, generic type."""
 		__hdr__ = (
-			("name", "H", 0),
+			("name", None, b"\x00"),
 			("type", "H", 0),
 			("cls", "H", 0),
 			("ttl", "I", 0),
@@ -158,18 +259,20 @@ class DNS(pypacker.Packet):
 			# TODO: add fields for mailbox, serial, refresh etc.
 		)
 
-		server_s = pypacker.get_property_dnsname("server")
+		_dns_names = None
+		name_s = get_property_dnsname_compressed("name")
+		server_s = get_property_dnsname_compressed("server")
 
 		def _dissect(self, buf):
 			# needed set format
-			# find server name by 0-termination
-			idx = buf.find(b"\x00", 12)
-			if idx == -1:
-				idx = len(buf)
-			self.server = buf[12: idx + 1]
+			idx = _get_name_end(buf, 0)
+			self.name = buf[:idx]
+			# find end of server name by labels/pointer
+			idx_server = _get_name_end(buf, idx + 10)
+			self.server = buf[idx + 10: idx_server]
 			# logger.debug("server: %s" % self.server)
 
-			return idx + 1
+			return idx_server
 
 	class AuthSOA(pypacker.Packet):
 		"""
@@ -210,7 +313,7 @@ class DNS(pypacker.Packet):
 	class AddRecord(pypacker.Packet):
 		"""DNS additional records."""
 		__hdr__ = (
-			("name", "H", 0),
+			("name", None, b"\x00"),
 			("type", "H", 0x0001),
 			("clz", "H", 0x0001),
 			("ts", "I", 0),
@@ -218,9 +321,13 @@ class DNS(pypacker.Packet):
 			("addr", None, b"\x01\x02\x03\x04")
 		)
 
+		_dns_names = None
+		name_s = get_property_dnsname_compressed("name")
+
 		def _dissect(self, buf):
-			# logger.debug(buf[0: idx+1])
-			self.addr = buf[12:]
+			idx = _get_name_end(buf, 0)
+			self.name = buf[:idx]
+			self.addr = buf[idx + 10:]
 			# logger.debug("addr: %s" % self.addr)
 			return len(buf)
 
@@ -236,87 +343,127 @@ class DNS(pypacker.Packet):
 			("dlen", "H", 0)
 		)
 
+	# (message, {offset: name}) to resolve compressed names, shared by all records
+	_dns_names = None
+
 	def _dissect(self, buf):
 		# unpack basic data to get things done
 		quests_amount, ans_amount, authserver_amount, addreq_amount = unpack_HHHH(buf[4:12])
+		self._dns_names = (buf, {})
+		# Only find section boundaries here: records get dissected on access
 		off = 12
 
-		# TODO: use lazy dissect, dns seems to be too shitty for this
-		#
-		# parse queries
-		#
-		#logger.debug(">>> parsing questions: %d" % quests_amount)
-		while quests_amount > 0:
-			# find name by 0-termination
-			idx = buf.find(b"\x00", off)
-			q_end = idx + 5
-			#logger.debug("name is: %s" % buf[off: q_end-4])
-			#logger.debug("Query is: %s" % buf[off: q_end])
-			#logger.debug(len(buf[off: q_end]))
-			q = DNS.Query(buf[off: q_end])
-			# logger.debug("query is following..")
-			#logger.debug("Query: %s" % q)
-			# logger.debug("query name format: %s" % q._name_format)
-			self.queries.append(q)
+		for _ in range(quests_amount):
+			# name + type + cls
+			off = _get_name_end(buf, off) + 4
+		off_answers = off
+		off = DNS._get_records_end(buf, off, ans_amount)
+		off_auths = off
+		off = DNS._get_records_end(buf, off, authserver_amount)
+		off_addrecords = off
+		off = DNS._get_records_end(buf, off, addreq_amount)
+
+		self._init_triggerlist("queries", buf[12: off_answers], self._unpack_queries)
+		self._init_triggerlist("answers", buf[off_answers: off_auths], self._unpack_answers)
+		self._init_triggerlist("auths", buf[off_auths: off_addrecords], self._unpack_auths)
+		self._init_triggerlist("addrecords", buf[off_addrecords: off], self._unpack_addrecords)
+		# logger.debug("dns: %s" % self)
+		return off
+
+	@staticmethod
+	def _get_records_end(buf, off, amount):
+		"""
+		return -- offset after amount resource records starting at buf[off]
+		"""
+		while amount > 0:
+			off = _get_name_end(buf, off)
+			dlen = unpack_H(buf[off + 8: off + 10])[0]
+			# type + cls + ttl + dlen + data
+			off += 10 + dlen
+			amount -= 1
+		return off
+
+	def _set_dns_names(self, records):
+		for record in records:
+			record._dns_names = self._dns_names
+		return records
+
+	def _unpack_queries(self, buf):
+		queries = []
+		off = 0
+
+		while off < len(buf):
+			q_end = _get_name_end(buf, off) + 4
+			queries.append(DNS.Query(buf[off: q_end]))
 			off = q_end
-			quests_amount -= 1
-
-		#
-		# parse answers
-		#
-		#logger.debug(">>> parsing answers: %d" % ans_amount)
-		while ans_amount > 0:
-			# find name by label/0-termination
-			# TODO: handle non-label names
-			dlen = unpack_H(buf[off + 10: off + 12])[0]
-			index_end = 12 + dlen
-			# logger.debug("Answer is: %r" % buf[off: off + index_end])
-			a = DNS.Answer(buf[off: off + index_end])
-			# logger.debug("Answer: %s" % a)
-			self.answers.append(a)
-			off += index_end
-			ans_amount -= 1
-
-		#
-		# parse authorative servers
-		#
-		#logger.debug(">>> parsing authorative servers: %d" % authserver_amount)
-		while authserver_amount > 0:
-			dlen = unpack_H(buf[off + 10: off + 12])[0]
-			authlen = 12 + dlen
-			# logger.debug("Auth: %r" % buf[off: off + authlen])
-			a = DNS.Auth(buf[off: off + authlen])
-
-			# logger.debug("Auth server: %s" % a)
-			self.auths.append(a)
-			off += authlen
-			authserver_amount -= 1
-
-		#
-		# parse additional requests
-		#
-		#logger.debug(">>> parsing additional records: %d" % addreq_amount)
-		while addreq_amount > 0:
+		return self._set_dns_names(queries)
+
+	def _unpack_records(self, buf, clz):
+		records = []
+		off = 0
+
+		while off < len(buf):
+			off_end = DNS._get_records_end(buf, off, 1)
+			records.append(clz(buf[off: off_end]))
+			off = off_end
+		return self._set_dns_names(records)
+
+	def _unpack_answers(self, buf):
+		return self._unpack_records(buf, DNS.Answer)
+
+	def _unpack_auths(self, buf):
+		return self._unpack_records(buf, DNS.Auth)
+
+	def _unpack_addrecords(self, buf):
+		addrecords = []
+		off = 0
+
+		while off < len(buf):
+			off_end = DNS._get_records_end(buf, off, 1)
+
 			if buf[off: off + 3] == b"\x00\x00\x29":
-				a = DNS.AddRecordRoot(buf[off: off + 11])
-				#logger.debug(a)
-				#logger.debug(a.bin())
-				#logger.debug(len(a.bin()))
-				off += 11
+				# OPT record, options (if any) become body bytes
+				addrecords.append(DNS.AddRecordRoot(buf[off: off_end]))
 			else:
-				# logger.debug(buf[idx:])
-				# logger.debug(buf[off:])
-				# logger.debug("data length via: %r" % buf[idx + 9: idx + 11])
-				dlen = unpack_H(buf[off + 10: off + 10 + 2])[0]
-				# logger.debug("AddRecord: %s" % buf[off: off + 12 + dlen])
-				a = DNS.AddRecord(buf[off: off + 12 + dlen])
-				# logger.debug("Additional Record: %s" % a)
-				off += 12 + dlen
-			self.addrecords.append(a)
-			addreq_amount -= 1
+				addrecords.append(DNS.AddRecord(buf[off: off_end]))
+			off = off_end
+		return self._set_dns_names(addrecords)
 
-		# logger.debug("dns: %s" % self)
-		return off
+	def _get_first_query(self):
+		"""
+		return -- (name, type) of the first question without dissecting all queries, None if not present
+		"""
+		queries = self._queries
+
+		if type(queries) is list:
+			# not yet dissected: [b"bytes", callback]
+			buf = queries[0]
+
+			if len(buf) == 0:
+				return None
+			idx = _get_name_end(buf, 0)
+			return (buf[:idx], unpack_H(buf[idx: idx + 2])[0])
+
+		if len(queries) == 0:
+			return None
+		return (queries[0].name, queries[0].type)
+
+	def _get_qname(self):
+		query = self._get_first_query()
+		return _resolve_name(self, query[0]) if query is not None else None
+
+	def _get_qname_s(self):
+		query = self._get_first_query()
+		return pypacker.dns_name_decode(_resolve_name(self, query[0])) if query is not None else None
+
+	def _get_qtype(self):
+		query = self._get_first_query()
+		return query[1] if query is not None else None
+
+	# name/type of the first question, this avoids dissecting any records
+	qname = property(_get_qname)
+	qname_s = property(_get_qname_s)
+	qtype = property(_get_qtype)
 
 	def bin(self, update_auto_fields=True):
 		if update_auto_fields and self._header_changed:
@@ -3,7 +3,6 @@ Primaly refer:
 	http://www.winpcap.org/ntar/draft/PCAP-DumpFileFormat.html
 
 TODO:
-	* Writer class implementation.
 	* Options getter/setter implementation.
 	* Support nanosecond.
 		Investigate the implementation to support multi interface.
@@ -35,22 +34,44 @@ Limitation:
 			| SHB | IDB | IDB | EPB | EPB | ... | EPB | ISB | ISB |
 			+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
 
-	( 'A`)< Only file reading...
+	Writer creates files having this format using little endian byte order.
+	StreamReader reads files without these limitations.
 
 TODO: generic interface for different reader/writer
 """
 
 from pypacker import pypacker
 from pypacker import ppcap
+import logging
 import struct
+import time
+
+logger = logging.getLogger("pypacker")
 
 # avoid references
 unpack = struct.unpack
+# block headers for Writer: type, block length, interface id, timestamp high/low, captured/original length
+pack_epb_le = struct.Struct("<IIIIIII").pack
+pack_ii_le = struct.Struct("<II").pack
+pack_hh_le = struct.Struct("<HH").pack
+pack_i_le = struct.Struct("<I").pack
+pack_q_le = struct.Struct("<Q").pack
+# for StreamReader: block type and length, option code and length
+unpack_from_ii_le = struct.Struct("<II").unpack_from
+unpack_from_ii_be = struct.Struct(">II").unpack_from
+unpack_from_hh_le = struct.Struct("<HH").unpack_from
+unpack_from_hh_be = struct.Struct(">HH").unpack_from
+# EPB: interface id, timestamp high/low, captured length
+unpack_from_iiii_le = struct.Struct("<IIII").unpack_from
+unpack_from_iiii_be = struct.Struct(">IIII").unpack_from
+# PB: interface id, drops count, timestamp high/low, captured length
+unpack_from_hhiii_le = struct.Struct("<HHIII").unpack_from
+unpack_from_hhiii_be = struct.Struct(">HHIII").unpack_from
 
 PCAPNG_IDB = 0x00000001		# Interface Description Block
-# PCAPNG_PB  = 0x00000002		# (obsolated) Packet Block
+PCAPNG_PB  = 0x00000002			# (obsolated) Packet Block
 PCAPNG_SPB = 0x00000003			# Simple Packet Block
-# PCAPNG_NRB = 0x00000004		# Name Resolution Block
+PCAPNG_NRB = 0x00000004			# Name Resolution Block
 PCAPNG_ISB = 0x00000005			# Interface Statistics Block
 PCAPNG_EPB = 0x00000006			# Enhanced Packet Block
 PCAPNG_SHB = 0x0A0D0D0A			# Section Header Block
@@ -86,6 +107,13 @@ OPT_ISB_USRDELIV = 8
 OPT_SHB_HARDWARE = 2
 OPT_SHB_OS = 3
 OPT_SHB_USERAPPL = 4
+OPT_EPB_FLAGS = 2
+OPT_EPB_HASH = 3
+OPT_EPB_DROPCOUNT = 4
+
+# epb_flags: packet direction (bits 0-1)
+EPB_FLAGS_INBOUND = 1
+EPB_FLAGS_OUTBOUND = 2
 
 IDB_OPTIONS = {
 	1: "opt_comment",
@@ -115,6 +143,13 @@ ISB_OPTIONS = {
 	8: "isb_usrdeliv",
 }
 
+EPB_OPTIONS = {
+	1: "opt_comment",
+	2: "epb_flags",
+	3: "epb_hash",
+	4: "epb_dropcount",
+}
+
 SHB_OPTIONS = {
 	1: "opt_comment",
 	2: "shb_hardware",
@@ -127,6 +162,26 @@ def _32bit_alignment(offset, length):
 	return (offset + length + 3) & 0xFFFC
 
 
+def _unpack_options(buf, off, unpack_from_hh):
+	"""
+	buf -- block bytes without the trailing block length
+	off -- offset of the first option
+	return -- list of (code, bytes) until opt_endofopt or end of block
+	"""
+	opts = []
+	end = len(buf)
+
+	while off + 4 <= end:
+		code, length = unpack_from_hh(buf, off)
+
+		if code == OPT_ENDOFOPT:
+			break
+		off += 4
+		opts.append((code, buf[off: off + length]))
+		off += (length + 3) & ~3
+	return opts
+
+
 class OPT(pypacker.Packet):
 	"""General option format"""
 	__hdr__ = (
@@ -196,6 +251,23 @@ class EPB(pypacker.Packet):
 		# TODO: getter and setter
 		pass
 
+	_opts = None
+
+	def _get_opts(self):
+		if self._opts is None:
+			# options follow the padded packet data, block ends with block length
+			body = self.body_bytes[:-4]
+			order = self._header_format_order
+			unpack_from_hh = unpack_from_hh_le if order == "<" else unpack_from_hh_be
+			self._opts = [self.OPT(struct.pack(order + "HH", code, len(value)) + value) for code, value in
+				_unpack_options(body, (self.cap_len + 3) & ~3, unpack_from_hh)]
+		return self._opts
+
+	# options of this block, parsed on first access
+	opts = property(_get_opts)
+	# captured packet data
+	data = property(lambda self: self.body_bytes[:self.cap_len])
+
 
 class EPB_LE(EPB):
 	__byte_order__ = "<"
@@ -239,16 +311,415 @@ class ISB_LE(ISB):
 		__byte_order__ = "<"
 
 
-# TODO: Writer
+def _pack_options(options):
+	"""
+	options -- list of (code, bytes)
+	return -- bytes of all options including opt_endofopt, empty if there are no options
+	"""
+	if not options:
+		return b""
+	bts_list = []
+
+	for code, value in options:
+		bts_list.append(pack_hh_le(code, len(value)))
+		bts_list.append(value)
+		bts_list.append(b"\x00" * (-len(value) & 3))
+	bts_list.append(b"\x00\x00\x00\x00")
+	return b"".join(bts_list)
+
+
+def _pack_block(block_type, body):
+	"""
+	return -- bytes of a complete block having the given type and body, body must be 32 bit aligned
+	"""
+	block_length = 12 + len(body)
+	return pack_ii_le(block_type, block_length) + body + pack_i_le(block_length)
+
+
 class Writer(object):
-	def __init__(self):
-		pass
+	"""
+	Streaming pcapng writer supporting multiple interfaces. Blocks are buffered
+	and written in bulk. Interface Statistics Blocks are written on close.
+	Note: this will use nanosecond timestamp resolution per default.
+	"""
+	def __init__(self, fileobj=None, filename=None, linktype=ppcap.DLT_EN10MB, snaplen=65535,
+		ts_resolution_nano=True, comment=None, userappl="pypacker", buffer_size=ppcap.WRITE_BUFFER_SIZE):
+		"""
+		fileobj -- create a pcapng-writer giving a file object retrieved by open(..., "wb")
+		filename -- create a pcapng-writer giving a file pcapng filename
+		linktype, snaplen, ts_resolution_nano -- parameters of the first interface (id 0),
+			no interface is added if linktype is None, see add_interface()
+		comment -- comment of the section
+		userappl -- name of the application creating the file
+		buffer_size -- amount of bytes to buffer until they get written to file
+		"""
+		# handle source modes
+		if fileobj is not None:
+			self.__fh = fileobj
+		elif filename is not None:
+			self.__fh = open(filename, "wb")
+		else:
+			raise Exception("No fileobject and no filename given..nothing to write!!!")
+
+		self._buffer_size = buffer_size
+		self._buffer = []
+		self._buffer_len = 0
+		self._timestamp = 0
+		# per interface: timestamp divisor
+		self._ts_divisors = []
+		# per interface: [packets written, first timestamp, last timestamp, statistic options]
+		self._interface_stats = []
+
+		options = []
+
+		if comment is not None:
+			options.append((OPT_COMMENT, comment.encode("utf-8")))
+		if userappl is not None:
+			options.append((OPT_SHB_USERAPPL, userappl.encode("utf-8")))
+		# section length is unknown: -1
+		body = pack_i_le(BE_MAGIC) + pack_hh_le(PCAPNG_VERSION_MAJOR, PCAPNG_VERSION_MINOR) +\
+			pack_q_le(0xFFFFFFFFFFFFFFFF) + _pack_options(options)
+		self._write_block(_pack_block(PCAPNG_SHB, body))
+
+		if linktype is not None:
+			self.add_interface(linktype=linktype, snaplen=snaplen, ts_resolution_nano=ts_resolution_nano)
+
+	def _write_block(self, bts):
+		self._buffer.append(bts)
+		self._buffer_len += len(bts)
+
+		if self._buffer_len >= self._buffer_size:
+			self.flush()
+
+	def add_interface(self, linktype=ppcap.DLT_EN10MB, snaplen=65535, ts_resolution_nano=True,
+		name=None, description=None):
+		"""
+		Add an interface by writing an Interface Description Block.
+
+		linktype -- link type of packets captured on this interface, ppcap.DLT_XXX
+		snaplen -- maximum amount of bytes stored per packet
+		ts_resolution_nano -- store timestamps using nanosecond resolution, microseconds otherwise
+		name -- name of the interface like "eth0"
+		description -- description of the interface
+		return -- interface id to be used for write()
+		"""
+		# if_tsresol: exponent of 10
+		options = [(OPT_IDB_IF_TSRESOL, b"\x09" if ts_resolution_nano else b"\x06")]
+
+		if name is not None:
+			options.append((OPT_IDB_IF_NAME, name.encode("utf-8")))
+		if description is not None:
+			options.append((OPT_IDB_IF_DESC, description.encode("utf-8")))
+		body = pack_hh_le(linktype, 0) + pack_i_le(snaplen) + _pack_options(options)
+		self._write_block(_pack_block(PCAPNG_IDB, body))
+		self._ts_divisors.append(1 if ts_resolution_nano else 1000)
+		self._interface_stats.append([0, None, None, []])
+		return len(self._ts_divisors) - 1
+
+	def set_statistics(self, interface_id, ifrecv=None, ifdrop=None, osdrop=None):
+		"""
+		Set statistics of an interface, eg taken from the capturing socket.
+		They get written to the Interface Statistics Block on close.
 
+		ifrecv -- amount of packets received by the interface
+		ifdrop -- amount of packets dropped by the interface
+		osdrop -- amount of packets dropped by the operating system
+		"""
+		options = []
 
-class Reader(object):
+		for code, value in ((OPT_ISB_IFRECV, ifrecv), (OPT_ISB_IFDROP, ifdrop), (OPT_ISB_OSDROP, osdrop)):
+			if value is not None:
+				options.append((code, pack_q_le(value)))
+		self._interface_stats[interface_id][3] = options
+
+	def write(self, bts, ts=None, interface_id=0, comment=None, flags=None):
+		"""
+		Write the given packet's bytes as Enhanced Packet Block.
+
+		bts -- bytes to be written
+		ts -- timestamp in Nanoseconds
+		interface_id -- id of the interface the packet was captured on, see add_interface()
+		comment -- comment of this packet
+		flags -- epb_flags value, eg EPB_FLAGS_INBOUND
+		"""
+		if ts is None:
+			ts = self._timestamp
+			self._timestamp += 1000000
+
+		stats = self._interface_stats[interface_id]
+		stats[0] += 1
+
+		if stats[1] is None:
+			stats[1] = ts
+		stats[2] = ts
+
+		ts_units = int(ts) // self._ts_divisors[interface_id]
+		n = len(bts)
+		padding = b"\x00" * (-n & 3)
+
+		if comment is None and flags is None:
+			block_length = 32 + n + len(padding)
+			bts_list = (pack_epb_le(PCAPNG_EPB, block_length, interface_id, ts_units >> 32,
+					ts_units & 0xFFFFFFFF, n, n), bts, padding, pack_i_le(block_length))
+		else:
+			options = []
+
+			if comment is not None:
+				options.append((OPT_COMMENT, comment.encode("utf-8")))
+			if flags is not None:
+				options.append((OPT_EPB_FLAGS, pack_i_le(flags)))
+			options = _pack_options(options)
+			block_length = 32 + n + len(padding) + len(options)
+			bts_list = (pack_epb_le(PCAPNG_EPB, block_length, interface_id, ts_units >> 32,
+					ts_units & 0xFFFFFFFF, n, n), bts, padding, options, pack_i_le(block_length))
+
+		self._buffer.extend(bts_list)
+		self._buffer_len += block_length
+
+		if self._buffer_len >= self._buffer_size:
+			self.flush()
+
+	def write_many(self, ts_bts_iterable, interface_id=0):
+		"""
+		Write multiple packets of one interface to file.
+
+		ts_bts_iterable -- iterable of (timestamp_nanoseconds, bytes) like returned by ppcap.Reader
+		"""
+		write = self.write
+
+		for ts, bts in ts_bts_iterable:
+			write(bts, ts=ts, interface_id=interface_id)
+
+	def flush(self):
+		"""Write all buffered blocks to file."""
+		self.__fh.writelines(self._buffer)
+		self._buffer.clear()
+		self._buffer_len = 0
+
+	def _write_statistics(self):
+		for interface_id, (packets, ts_start, ts_end, options) in enumerate(self._interface_stats):
+			ts_divisor = self._ts_divisors[interface_id]
+			options_all = []
+
+			if ts_start is not None:
+				for code, ts in ((OPT_ISB_STARTTIME, ts_start), (OPT_ISB_ENDTIME, ts_end)):
+					ts_units = int(ts) // ts_divisor
+					options_all.append((code, pack_ii_le(ts_units >> 32, ts_units & 0xFFFFFFFF)))
+			options_all.extend(options)
+			options_all.append((OPT_ISB_USRDELIV, pack_q_le(packets)))
+			ts_units = time.time_ns() // ts_divisor
+			body = pack_i_le(interface_id) + pack_ii_le(ts_units >> 32, ts_units & 0xFFFFFFFF) +\
+				_pack_options(options_all)
+			self._write_block(_pack_block(PCAPNG_ISB, body))
+
+	def close(self):
+		"""Write Interface Statistics Blocks and all buffered blocks, close the file."""
+		self._write_statistics()
+		self.flush()
+		self.__fh.close()
+
+
+class Interface(object):
+	"""Interface of a section described by an Interface Description Block, see StreamReader."""
+	def __init__(self, linktype, snaplen, options):
+		"""
+		linktype -- link type, ppcap.DLT_XXX
+		snaplen -- maximum amount of bytes stored per packet
+		options -- list of (code, bytes) of the IDB, byte order already converted
+			for if_tsoffset (signed 64 bit seconds)
+		"""
+		self.linktype = linktype
+		self.snaplen = snaplen
+		self.name = None
+		tsresol = 6
+		# seconds added to all timestamps
+		self.ts_offset = 0
+
+		for code, value in options:
+			if code == OPT_IDB_IF_NAME:
+				self.name = value.decode("utf-8", "replace")
+			elif code == OPT_IDB_IF_TSRESOL:
+				tsresol = value[0]
+			elif code == OPT_IDB_IF_TSOFFSET:
+				self.ts_offset = value
+
+		# timestamp units per second: negative power of 2 if MSB is set, negative power of 10 otherwise
+		self.ts_units = 1 << (tsresol & 0x7F) if tsresol & 0x80 else 10 ** tsresol
+
+		# ts_nanoseconds = ts_units * ts_mul // ts_div + ts_offset_ns
+		if 1000000000 % self.ts_units == 0:
+			self.ts_mul = 1000000000 // self.ts_units
+			self.ts_div = 1
+		else:
+			self.ts_mul = 1000000000
+			self.ts_div = self.ts_units
+		self.ts_offset_ns = self.ts_offset * 1000000000
+
+	def to_nanoseconds(self, ts):
+		"""
+		ts -- timestamp in units of this interface
+		return -- timestamp in nanoseconds
+		"""
+		return ts * self.ts_mul // self.ts_div + self.ts_offset_ns
+
+
+class StreamReader(object):
+	"""
+	Forward-only pcapng reader, no seeking is done so pipes and files being written can be read.
+	Multiple sections (SHBs), multiple interfaces per section, per interface timestamp
+	resolution (if_tsresol, if_tsoffset), SPBs and obsolete PBs are supported. Unknown blocks
+	are skipped. Iterating returns (timestamp_nanoseconds, interface_id, bytes), timestamps are
+	None for SPBs as they don't store one. The file is read in blocks of block_size bytes and
+	only the fixed fields of packet blocks are unpacked, options of packet blocks are skipped.
+	"""
+	def __init__(self, fileobj=None, filename=None, block_size=ppcap.BLOCK_SIZE_DEFAULT):
+		"""
+		fileobj -- create a pcapng-reader giving a file object retrieved by open(..., "rb")
+		filename -- create a pcapng-reader giving a filename
+		block_size -- amount of bytes to read at once
+		"""
+		# handle source modes
+		if fileobj is not None:
+			self.__fh = fileobj
+		elif filename is not None:
+			self.__fh = open(filename, "rb")
+		else:
+			raise Exception("No fileobject and no filename given..nothing to read!!!")
+
+		self._block_size = block_size
+		# interfaces of the current section
+		self.interfaces = []
+		# amount of sections read until now
+		self.sections = 0
+		self._unpack_from_ii = unpack_from_ii_le
+		self._unpack_from_hh = unpack_from_hh_le
+		self._unpack_from_iiii = unpack_from_iiii_le
+		self._unpack_from_hhiii = unpack_from_hhiii_le
+		self._q_fmt = "<q"
+
+	def _read(self, buf, pos, amount):
+		"""
+		Drop consumed bytes and read at least amount bytes more if possible.
+
+		return -- new buffer starting at pos of the old one
+		"""
+		bts_list = [buf[pos:]]
+		# don't wait for a full block eg on pipes
+		read = getattr(self.__fh, "read1", self.__fh.read)
+
+		while amount > 0:
+			bts = read(max(amount, self._block_size))
 
-	def __init__(self, fileobj=None, filename=None, lowest_layer=None, filter=None, ts_conversion=True):
+			if not bts:
+				break
+			bts_list.append(bts)
+			amount -= len(bts)
+		return b"".join(bts_list)
+
+	def _set_byte_order(self, magic):
+		if magic == b"\x4d\x3c\x2b\x1a":
+			self._unpack_from_ii = unpack_from_ii_le
+			self._unpack_from_hh = unpack_from_hh_le
+			self._unpack_from_iiii = unpack_from_iiii_le
+			self._unpack_from_hhiii = unpack_from_hhiii_le
+			self._q_fmt = "<q"
+		elif magic == b"\x1a\x2b\x3c\x4d":
+			self._unpack_from_ii = unpack_from_ii_be
+			self._unpack_from_hh = unpack_from_hh_be
+			self._unpack_from_iiii = unpack_from_iiii_be
+			self._unpack_from_hhiii = unpack_from_hhiii_be
+			self._q_fmt = ">q"
+		else:
+			raise ValueError("invalid section header magic: %r" % magic)
+
+	def _add_interface(self, buf):
+		"""
+		buf -- bytes of the IDB without trailing block length
+		"""
+		linktype, _ = self._unpack_from_hh(buf, 8)
+		snaplen = self._unpack_from_ii(buf, 12)[0]
+		options = _unpack_options(buf, 16, self._unpack_from_hh)
+		options = [(code, unpack(self._q_fmt, value)[0] if code == OPT_IDB_IF_TSOFFSET else value)
+			for code, value in options]
+		self.interfaces.append(Interface(linktype, snaplen, options))
 
+	def __iter__(self):
+		"""
+		return -- iterator of (timestamp_nanoseconds, interface_id, bytes)
+		"""
+		interfaces = self.interfaces
+		unpack_from_ii = self._unpack_from_ii
+		unpack_from_iiii = self._unpack_from_iiii
+		buf = b""
+		pos = 0
+
+		while True:
+			if len(buf) - pos < 12:
+				buf = self._read(buf, pos, 12)
+				pos = 0
+
+				if len(buf) < 12:
+					if buf:
+						logger.warning("incomplete block at end of file")
+					return
+
+			if buf[pos: pos + 4] == b"\x0a\x0d\x0d\x0a":
+				# new section: byte order is given by magic
+				self._set_byte_order(buf[pos + 8: pos + 12])
+				unpack_from_ii = self._unpack_from_ii
+				unpack_from_iiii = self._unpack_from_iiii
+			elif self.sections == 0:
+				raise ValueError("not a pcapng file: first block is not a section header block")
+
+			block_type, block_length = unpack_from_ii(buf, pos)
+
+			if block_length < 12 or block_length & 3:
+				raise ValueError("invalid block length %d of block type %X" % (block_length, block_type))
+
+			if len(buf) - pos < block_length:
+				buf = self._read(buf, pos, block_length - (len(buf) - pos))
+				pos = 0
+
+				if len(buf) < block_length:
+					logger.warning("incomplete block at end of file")
+					return
+
+			if block_type == PCAPNG_EPB:
+				iface_id, ts_high, ts_low, cap_len = unpack_from_iiii(buf, pos + 8)
+				iface = interfaces[iface_id]
+				ts = ((ts_high << 32) | ts_low) * iface.ts_mul // iface.ts_div + iface.ts_offset_ns
+				yield ts, iface_id, buf[pos + 28: pos + 28 + cap_len]
+			elif block_type == PCAPNG_SPB:
+				# captured length is given by block length and snaplen only
+				cap_len = min(unpack_from_ii(buf, pos + 8)[0], block_length - 16,
+					interfaces[0].snaplen or 0xFFFFFFFF)
+				yield None, 0, buf[pos + 12: pos + 12 + cap_len]
+			elif block_type == PCAPNG_SHB:
+				self.sections += 1
+				# interface ids are per section, create a new list: references to the old one stay valid
+				interfaces = self.interfaces = []
+			elif block_type == PCAPNG_IDB:
+				self._add_interface(buf[pos: pos + block_length - 4])
+			elif block_type == PCAPNG_PB:
+				iface_id, _, ts_high, ts_low, cap_len = self._unpack_from_hhiii(buf, pos + 8)
+				iface = interfaces[iface_id]
+				ts = ((ts_high << 32) | ts_low) * iface.ts_mul // iface.ts_div + iface.ts_offset_ns
+				yield ts, iface_id, buf[pos + 28: pos + 28 + cap_len]
+			# other blocks like ISB, NRB or custom blocks are skipped
+			pos += block_length
+
+	def close(self):
+		self.__fh.close()
+
+
+class Reader(object):
+
+	def __init__(self, fileobj=None, filename=None, lowest_layer=None, filter=None, ts_conversion=True,
+		raw=False):
+		"""
+		raw -- return (timestamp_nanoseconds, bytes) instead of (timestamp, Enhanced_Packet_Block).
+			Only the fixed fields of every EPB are unpacked, timestamps respect if_tsresol.
+		"""
 		self.idbs = []
 		self.isbs = []
 		self.__block_order__ = ""
@@ -288,17 +759,24 @@ class Reader(object):
 				if self.shb.magic == LE_MAGIC:
 					self.__to_le()
 					self.shb = self._SHB(buf)
-				self.shb.opts = self.__unpack_opt(buf, self._SHB)
+				self.shb.opts = self.__unpack_opt(buf, self.shb)
 
 			elif block_type == PCAPNG_IDB:
 				buf = buf + self.__fh.read(block_length - len(buf))
 				_idb = self._IDB(buf)
-				_idb.opts = self.__unpack_opt(buf, self._IDB)
+				_idb.opts = self.__unpack_opt(buf, _idb)
 				self.idbs.append(_idb)
 
 			elif block_type == PCAPNG_EPB:
 				self.__iter_pos = self.__fh.tell() - 8
-				self.__next__ = self._next_bytes_conversion
+
+				if raw:
+					self._interfaces = [self.__idb_to_interface(idb) for idb in self.idbs]
+					self._unpack_from_iiii = unpack_from_iiii_le if self.__block_order__ == "<" else\
+						unpack_from_iiii_be
+					self.__next__ = self._next_raw
+				else:
+					self.__next__ = self._next_bytes_conversion
 				# TODO: Support nanosecond
 				self.__resolution_factor = 1000000.0
 				break
@@ -337,7 +815,7 @@ class Reader(object):
 			if block_type == PCAPNG_ISB:
 				buf = buf + self.__fh.read(block_length - len(buf))
 				_isb = self._ISB(buf)
-				_isb.opts = self.__unpack_opt(buf, self._ISB)
+				_isb.opts = self.__unpack_opt(buf, _isb)
 				self.isbs.append(_isb)
 
 			else:
@@ -350,21 +828,32 @@ class Reader(object):
 		self._ISB = ISB_LE
 		self._SHB = SHB_LE
 
-	def __unpack_opt(self, buf, BLOCK):
-		offset = BLOCK._hdr_fmt.size
+	def __unpack_opt(self, buf, block):
+		# options follow the block header and end before the trailing block length
+		offset = block.header_len
+		end = len(buf) - 4
 		opts = []
-		while 1:
-			opt_hdr = buf[offset:offset + OPT._hdr_fmt.size]
-			if not opt_hdr:
-				break
+		while offset + 4 <= end:
+			opt_hdr = buf[offset:offset + 4]
 			code, length = unpack(self.__block_order__ + "2H", opt_hdr)
-			opt = BLOCK.OPT(buf[offset:offset + OPT._hdr_fmt.size + length])
+			opt = block.OPT(buf[offset:offset + 4 + length])
 			if opt.code == OPT_ENDOFOPT:
 				break
 			opts.append(opt)
-			offset = _32bit_alignment(offset + OPT._hdr_fmt.size, length)
+			offset = _32bit_alignment(offset + 4, length)
 		return opts
 
+	def __idb_to_interface(self, idb):
+		options = []
+
+		for opt in idb.opts:
+			value = opt.body_bytes
+
+			if opt.code == OPT_IDB_IF_TSOFFSET:
+				value = unpack(self.__block_order__ + "q", value)[0]
+			options.append((opt.code, value))
+		return Interface(idb.linktype, idb.snaplen, options)
+
 	def _next_bytes_conversion(self):
 		"""
 		Standard __next__ implementation. Needs to be a sepearte method to be called by producer.
@@ -381,11 +870,30 @@ class Reader(object):
 			raise StopIteration
 
 		buf = buf + self.__fh.read(block_length - len(buf))
+		# options are parsed on access of _epb.opts
 		_epb = self._EPB(buf)
-		_epb.opts = self.__unpack_opt(buf, self._EPB)
 
 		return (((_epb.ts_high << 32) + _epb.ts_low) / self.__resolution_factor, _epb)
 
+	def _next_raw(self):
+		"""
+		__next__ implementation for raw mode: only unpack fixed fields of EPBs.
+
+		return -- (timestamp_nanoseconds, bytes)
+		"""
+		buf = self.__fh.read(8)
+		if not buf:
+			raise StopIteration
+
+		block_type, block_length = unpack(self.__block_order__ + "2I", buf)
+		if not block_type == PCAPNG_EPB:
+			raise StopIteration
+
+		buf = self.__fh.read(block_length - 8)
+		iface_id, ts_high, ts_low, cap_len = self._unpack_from_iiii(buf)
+		iface = self._interfaces[iface_id]
+		return (((ts_high << 32) | ts_low) * iface.ts_mul // iface.ts_div + iface.ts_offset_ns, buf[20: 20 + cap_len])
+
 	def __iter__(self):
 		"""
 		return -- (timestamp, Enhanced Packet Block) for pcap-reader depending on configuration.
@@ -2,9 +2,20 @@
 Packet read and write routines for pcap format.
 See http://wiki.wireshark.org/Development/LibpcapFileFormat
 """
+import array
+import bisect
+import heapq
+import importlib
+import io
 import sys
 import logging
+import mmap
+import os
+import queue
 import struct
+import threading
+import time
+from collections import deque
 
 from pypacker import pypacker
 
@@ -40,10 +51,33 @@ DLT_IEEE802_11			= 105
 DLT_LINUX_SLL			= 113
 DLT_PFLOG			= 117
 DLT_IEEE802_11_RADIO		= 127
+DLT_PRISM_HEADER		= 119
+DLT_CAN_SOCKETCAN		= 227
+DLT_IPV4			= 228
+DLT_IPV6			= 229
+# raw IPv4/IPv6 as stored in files, DLT_RAW values differ between platforms
+LINKTYPE_RAW			= 101
 
 _MODE_BYTES			= 0
 _MODE_PACKETS			= 1
 
+# sidecar index file: <pcap filename> + INDEX_FILE_SUFFIX, see Reader.build_index()
+INDEX_FILE_SUFFIX		= ".pidx"
+INDEX_MAGIC			= b"PPIX"
+INDEX_VERSION			= 1
+# magic, version, byte order (0=little, 1=big), pcap size, pcap mtime (ns), amount of packets
+_index_hdr = struct.Struct("<4sHHQQQ")
+
+# amount of packets between checkpoints used by Reader.seek_time()
+CHECKPOINT_INTERVAL		= 1024
+
+# block size used for Reader(..., block_size=BLOCK_SIZE_DEFAULT), bigger blocks
+# (eg 4-16 MiB) need less read calls on network filesystems but are slower on local files
+BLOCK_SIZE_DEFAULT		= 1024 * 1024
+# minimum and maximum seconds to wait for new data in follow mode, see Reader.follow()
+FOLLOW_INTERVAL_MIN		= 0.01
+FOLLOW_INTERVAL_MAX		= 1.0
+
 if sys.platform.find("openbsd") != -1:
 	DLT_LOOP	= 12
 	DLT_RAW		= 14
@@ -122,28 +156,281 @@ class LEPktHdr(pypacker.Packet):
 	__byte_order__ = "<"
 
 
+# compressed files, see Reader and Writer
+COMPRESSION_GZIP		= "gz"
+COMPRESSION_XZ			= "xz"
+COMPRESSION_BZIP2		= "bz2"
+
+_COMPRESSION_MAGICS = (
+	(b"\x1f\x8b", COMPRESSION_GZIP),
+	(b"\xfd7zXZ\x00", COMPRESSION_XZ),
+	(b"BZh", COMPRESSION_BZIP2)
+)
+
+# modules are imported on first usage: Python builds can lack _lzma or _bz2
+_COMPRESSION_MODULES = {
+	COMPRESSION_GZIP: "gzip",
+	COMPRESSION_XZ: "lzma",
+	COMPRESSION_BZIP2: "bz2"
+}
+
+# size of chunks passed between codec thread and reading/writing thread
+COMPRESSION_CHUNK_SIZE		= 1024 * 1024
+# maximum amount of chunks waiting in queue
+COMPRESSION_QUEUE_SIZE		= 8
+
+
+def get_compression(buf):
+	"""
+	buf -- the first bytes of a file, at least 6 bytes
+	return -- COMPRESSION_XXX or None if no compression was detected
+	"""
+	for magic, compression in _COMPRESSION_MAGICS:
+		if buf.startswith(magic):
+			return compression
+	return None
+
+
+def get_compression_by_filename(filename):
+	"""
+	return -- COMPRESSION_XXX based on the filename extension, None if not compressed
+	"""
+	ext = os.path.splitext(filename)[1][1:]
+	return ext if ext in _COMPRESSION_MODULES else None
+
+
+def _open_compression(fileobj, compression, mode):
+	"""
+	fileobj -- file object or filename of the compressed file
+	compression -- COMPRESSION_XXX
+	mode -- "rb" or "wb"
+	return -- file object returned by gzip.open(), lzma.open() or bz2.open()
+	"""
+	try:
+		module_name = _COMPRESSION_MODULES[compression]
+	except KeyError:
+		raise ValueError("unknown compression: %r" % compression)
+
+	try:
+		module = importlib.import_module(module_name)
+	except ImportError as ex:
+		raise ImportError("%s compression is not supported by this Python build: %s" % (compression, ex))
+	return module.open(fileobj, mode)
+
+
+class _DecompressingReader(object):
+	"""
+	Read only file object decompressing data in a background thread. zlib, lzma and bz2
+	release the GIL while decompressing so this runs in parallel to parsing.
+	"""
+	def __init__(self, fileobj, compression):
+		"""
+		fileobj -- file object of the compressed file
+		compression -- COMPRESSION_XXX
+		"""
+		self._fh = _open_compression(fileobj, compression, "rb")
+		self._fh_compressed = fileobj
+		self._queue = queue.Queue(COMPRESSION_QUEUE_SIZE)
+		self._chunks = deque()
+		self._chunks_len = 0
+		self._pos = 0
+		self._eof = False
+		self._error = None
+		self._stopped = False
+		self._thread = threading.Thread(target=self._decompress, daemon=True)
+		self._thread.start()
+
+	def _put(self, item):
+		while not self._stopped:
+			try:
+				self._queue.put(item, timeout=0.1)
+				return
+			except queue.Full:
+				pass
+
+	def _decompress(self):
+		try:
+			while not self._stopped:
+				chunk = self._fh.read(COMPRESSION_CHUNK_SIZE)
+
+				if not chunk:
+					break
+				self._put(chunk)
+		except Exception as ex:
+			self._error = ex
+		# EOF
+		self._put(None)
+
+	def read(self, amount=-1):
+		"""
+		return -- up to amount decompressed bytes, less only on EOF
+		"""
+		chunks = self._chunks
+
+		while (amount < 0 or self._chunks_len < amount) and not self._eof:
+			chunk = self._queue.get()
+
+			if chunk is None:
+				self._eof = True
+
+				if self._error is not None:
+					raise self._error
+				break
+			chunks.append(chunk)
+			self._chunks_len += len(chunk)
+
+		if amount < 0 or amount >= self._chunks_len:
+			bts = b"".join(chunks)
+			chunks.clear()
+		else:
+			bts = b"".join(chunks)
+			chunks.clear()
+			chunks.append(bts[amount:])
+			bts = bts[:amount]
+		self._chunks_len -= len(bts)
+		self._pos += len(bts)
+		return bts
+
+	def tell(self):
+		return self._pos
+
+	def seek(self, pos, whence=0):
+		raise io.UnsupportedOperation("seeking is not supported for compressed files")
+
+	def close(self):
+		self._stopped = True
+		self._thread.join()
+		self._fh.close()
+		self._fh_compressed.close()
+
+
+class _CompressingWriter(object):
+	"""Write only file object compressing data in a background thread."""
+	def __init__(self, fileobj, compression):
+		"""
+		fileobj -- file object for the compressed file
+		compression -- COMPRESSION_XXX
+		"""
+		self._fh = _open_compression(fileobj, compression, "wb")
+		self._fh_compressed = fileobj
+		self._queue = queue.Queue(COMPRESSION_QUEUE_SIZE)
+		self._error = None
+		self._thread = threading.Thread(target=self._compress, daemon=True)
+		self._thread.start()
+
+	def _compress(self):
+		while True:
+			bts = self._queue.get()
+
+			if bts is None:
+				break
+
+			try:
+				self._fh.write(bts)
+			except Exception as ex:
+				self._error = ex
+
+	def write(self, bts):
+		if self._error is not None:
+			raise self._error
+		self._queue.put(bts)
+
+	def writelines(self, bts_list):
+		self.write(b"".join(bts_list))
+
+	def close(self):
+		self._queue.put(None)
+		self._thread.join()
+		self._fh.close()
+		self._fh_compressed.close()
+
+		if self._error is not None:
+			raise self._error
+
+
+def open_compressed(fileobj, compression, mode="rb", threaded=True):
+	"""
+	Open a gzip, xz or bzip2 compressed file.
+
+	fileobj -- file object or filename of the compressed file, closed on closing the returned file
+	compression -- COMPRESSION_XXX
+	mode -- "rb" or "wb"
+	threaded -- decompress/compress in a background thread, the returned file object
+		supports read(), tell() and close() respectively write(), writelines() and close()
+	return -- file object
+	"""
+	if mode not in ("rb", "wb"):
+		raise ValueError("mode has to be \"rb\" or \"wb\": %r" % mode)
+
+	if not threaded:
+		return _open_compression(fileobj, compression, mode)
+
+	if type(fileobj) is str:
+		fileobj = open(fileobj, mode)
+
+	try:
+		if mode == "rb":
+			return _DecompressingReader(fileobj, compression)
+		return _CompressingWriter(fileobj, compression)
+	except Exception:
+		fileobj.close()
+		raise
+
+
+# amount of bytes buffered by Writer until written to file
+WRITE_BUFFER_SIZE		= 1024 * 1024
+
+pack_IIII_be = struct.Struct(">IIII").pack
+pack_IIII_le = struct.Struct("<IIII").pack
+
+
 class Writer(object):
 	"""
-	Simple pcap writer supporting pcap format.
-	Note: this will use nanosecond timestamp resolution.
+	Simple pcap writer supporting pcap format. Records are buffered and written in blocks.
+	Note: this will use nanosecond timestamp resolution per default.
 	"""
-	def __init__(self, fileobj=None, filename=None, snaplen=1500, linktype=DLT_EN10MB):
+	def __init__(self, fileobj=None, filename=None, snaplen=1500, linktype=DLT_EN10MB,
+		ts_resolution_nano=True, reader=None, buffer_size=WRITE_BUFFER_SIZE, compression=None):
 		"""
 		fileobj -- create a pcap-writer giving a file object retrieved by open(..., "wb")
 		filename -- create a pcap-writer giving a file pcap filename
+		ts_resolution_nano -- store timestamps using nanosecond resolution, microseconds otherwise
+		reader -- take snaplen, linktype, timestamp resolution and byte order from the file header
+			of this Reader, needed to copy records via write_raw()
+		buffer_size -- amount of bytes to buffer until they get written to file
+		compression -- compress output using COMPRESSION_XXX in a background thread,
+			default for filenames ending with ".gz", ".xz" or ".bz2"
 		"""
 		# handle source modes
 		if fileobj is not None:
 			self.__fh = fileobj
 		elif filename is not None:
 			self.__fh = open(filename, "wb")
+
+			if compression is None:
+				compression = get_compression_by_filename(filename)
 		else:
 			raise Exception("No fileobject and no filename given..nothing to read!!!")
 
-		fh = FileHdr(magic=TCPDUMP_MAGIC_NANO, snaplen=snaplen, linktype=linktype)
+		if compression is not None:
+			self.__fh = open_compressed(self.__fh, compression, "wb")
+
+		if reader is not None:
+			fh = reader.file_header
+			self._resolution_nano = fh.magic in (TCPDUMP_MAGIC_NANO, TCPDUMP_MAGIC_NANO_SWAPPED)
+			self._pack_meta = pack_IIII_le if type(fh) is LEFileHdr else pack_IIII_be
+		else:
+			magic = TCPDUMP_MAGIC_NANO if ts_resolution_nano else TCPDUMP_MAGIC
+			fh = FileHdr(magic=magic, snaplen=snaplen, linktype=linktype)
+			self._resolution_nano = ts_resolution_nano
+			self._pack_meta = pack_IIII_be
+
 		# logger.debug("writing fileheader %r" % fh)
 		self.__fh.write(fh.bin())
 		self._timestamp = 0
+		self._buffer_size = buffer_size
+		self._buffer = []
+		self._buffer_len = 0
 
 	def write(self, bts, ts=None):
 		"""
@@ -154,26 +441,320 @@ class Writer(object):
 		"""
 		# split timestamp into seconds, nanoseconds
 		if ts is None:
-			sec = self._timestamp // 1000000000
-			nsec = int(self._timestamp - (sec * 1000000000))
+			ts = self._timestamp
 			self._timestamp += 1000000
-		else:
-			sec = int(ts / 1000000000)
-			nsec = ts - (sec * 1000000000)
 
+		sec, nsec = divmod(int(ts), 1000000000)
+
+		if not self._resolution_nano:
+			nsec //= 1000
 		# logger.debug("paket time sec/nsec: %d/%d" % (sec, nsec))
 		n = len(bts)
-		ph = PktHdr(tv_sec=sec, tv_usec=nsec, caplen=n, len=n)
-		# logger.debug("writing packet header + packet data")
-		self.__fh.write(ph.bin())
-		self.__fh.write(bts)
+		self._buffer.append(self._pack_meta(sec, nsec, n, n))
+		self._buffer.append(bts)
+		self._buffer_len += 16 + n
+
+		if self._buffer_len >= self._buffer_size:
+			self.flush()
+
+	def write_many(self, ts_bts_iterable):
+		"""
+		Write multiple packets to file.
+
+		ts_bts_iterable -- iterable of (timestamp_nanoseconds, bytes) like returned by Reader
+		"""
+		buffer_append = self._buffer.append
+		pack_meta = self._pack_meta
+		resolution_nano = self._resolution_nano
+		buffer_size = self._buffer_size
+
+		for ts, bts in ts_bts_iterable:
+			sec, nsec = divmod(int(ts), 1000000000)
+
+			if not resolution_nano:
+				nsec //= 1000
+			n = len(bts)
+			buffer_append(pack_meta(sec, nsec, n, n))
+			buffer_append(bts)
+			self._buffer_len += 16 + n
+
+			if self._buffer_len >= buffer_size:
+				self.flush()
+
+	def write_raw(self, record):
+		"""
+		Write a complete record (header and data) like returned by Reader.iter_raw().
+		The record header has to match byte order and timestamp resolution of this file,
+		see parameter reader of Writer.
+
+		record -- bytes of the record
+		"""
+		self._buffer.append(record)
+		self._buffer_len += len(record)
+
+		if self._buffer_len >= self._buffer_size:
+			self.flush()
+
+	def flush(self):
+		"""Write all buffered records to file."""
+		self.__fh.writelines(self._buffer)
+		self._buffer.clear()
+		self._buffer_len = 0
 
 	def close(self):
+		self.flush()
 		self.__fh.close()
 
 
+class RotatingWriter(object):
+	"""
+	pcap writer splitting output into multiple files by size, amount of packets or time interval.
+	Files are named "<base>_<number><ext>", eg "capture_00000.pcap" for filename "capture.pcap".
+	The next file is opened ahead of time, closing completed files and calling the
+	callback is done in a background thread to not block the capture.
+	"""
+	def __init__(self, filename, max_bytes=None, max_packets=None, interval=None, max_files=None,
+		callback_completed=None, **writer_kwargs):
+		"""
+		filename -- base filename, a number is added before the extension
+		max_bytes -- rotate if the file would exceed this amount of bytes
+		max_packets -- rotate after this amount of packets
+		interval -- rotate after this amount of seconds (wall-clock time)
+		max_files -- maximum amount of files to keep (ring), the oldest files get deleted
+		callback_completed -- called with the filename of every completed file:
+			callback(filename). This is called in a background thread.
+		writer_kwargs -- parameters passed to Writer (snaplen, linktype, ts_resolution_nano, ...)
+		"""
+		self._filename_base, self._filename_ext = os.path.splitext(filename)
+
+		if get_compression_by_filename(filename) is not None:
+			# keep "xxx.pcap.gz" as suffix, needed to detect the compression
+			base, ext = os.path.splitext(self._filename_base)
+			self._filename_base, self._filename_ext = base, ext + self._filename_ext
+		self._max_bytes = max_bytes
+		self._max_packets = max_packets
+		self._interval = interval
+		self._max_files = max_files
+		self._callback_completed = callback_completed
+		self._writer_kwargs = writer_kwargs
+		self._files_completed = deque()
+		self._file_idx = 0
+		# not imported on module level: only needed for rotating files
+		from concurrent.futures import ThreadPoolExecutor
+		self._executor = ThreadPoolExecutor(max_workers=1)
+		self._writer, self._filename = self._open_writer(0)
+		self._writer_next_future = self._executor.submit(self._open_writer, 1)
+		self._start_file()
+
+	def _get_filename(self, idx):
+		return "%s_%05d%s" % (self._filename_base, idx, self._filename_ext)
+
+	def _open_writer(self, idx):
+		filename = self._get_filename(idx)
+		return Writer(filename=filename, **self._writer_kwargs), filename
+
+	def _start_file(self):
+		self._bytes = 24
+		self._packets = 0
+		self._time_end = None if self._interval is None else time.time() + self._interval
+
+	def _complete_file(self, writer, filename, files_active):
+		"""
+		Close a completed file, remove old files and call the callback. Run by the background thread.
+
+		files_active -- amount of files still being written which count as retained files
+		"""
+		writer.close()
+		self._files_completed.append(filename)
+
+		if self._max_files is not None:
+			while len(self._files_completed) > 0 and len(self._files_completed) + files_active > self._max_files:
+				filename_old = self._files_completed.popleft()
+
+				try:
+					os.remove(filename_old)
+				except OSError as ex:
+					logger.warning("could not remove %s: %r" % (filename_old, ex))
+
+		if self._callback_completed is not None:
+			try:
+				self._callback_completed(filename)
+			except Exception as ex:
+				logger.exception(ex)
+
+	def rotate(self):
+		"""Continue writing to the next file."""
+		self._executor.submit(self._complete_file, self._writer, self._filename, 1)
+		# normally opened allready
+		self._writer, self._filename = self._writer_next_future.result()
+		self._file_idx += 1
+		self._writer_next_future = self._executor.submit(self._open_writer, self._file_idx + 1)
+		self._start_file()
+
+	def write(self, bts, ts=None):
+		"""
+		Write the given packet's bytes to the current file, rotate before if needed.
+
+		bts -- bytes to be written
+		ts -- timestamp in Nanoseconds
+		"""
+		if self._packets > 0:
+			if (self._max_packets is not None and self._packets >= self._max_packets) or\
+				(self._max_bytes is not None and self._bytes + 16 + len(bts) > self._max_bytes) or\
+				(self._time_end is not None and time.time() >= self._time_end):
+				self.rotate()
+
+		self._writer.write(bts, ts=ts)
+		self._bytes += 16 + len(bts)
+		self._packets += 1
+
+	def write_many(self, ts_bts_iterable):
+		"""
+		Write multiple packets.
+
+		ts_bts_iterable -- iterable of (timestamp_nanoseconds, bytes) like returned by Reader
+		"""
+		for ts, bts in ts_bts_iterable:
+			self.write(bts, ts=ts)
+
+	def _get_filename_current(self):
+		return self._filename
+
+	# name of the file currently written
+	filename = property(_get_filename_current)
+
+	def flush(self):
+		"""Write all buffered records of the current file."""
+		self._writer.flush()
+
+	def close(self):
+		"""Complete the current file and wait for all background tasks."""
+		self._executor.submit(self._complete_file, self._writer, self._filename, 0)
+		# the preopened file is not needed anymore
+		writer_next, filename_next = self._writer_next_future.result()
+		writer_next.close()
+		os.remove(filename_next)
+		self._executor.shutdown(wait=True)
+
+
+# overflow policies of AsyncWriter
+OVERFLOW_BLOCK			= 0
+OVERFLOW_DROP_NEWEST		= 1
+OVERFLOW_DROP_OLDEST		= 2
+
+
+class AsyncWriter(object):
+	"""
+	Writes packets in a background thread using a Writer or RotatingWriter. write() only
+	puts packets into a bounded queue so capturing is not blocked by a stalling disk.
+	The writer thread takes all queued packets at once and flushes after the queue ran empty.
+	"""
+	def __init__(self, writer, queue_size=65536, overflow=OVERFLOW_BLOCK):
+		"""
+		writer -- Writer or RotatingWriter used to write packets, closed by close()
+		queue_size -- maximum amount of packets waiting to be written
+		overflow -- what to do if the queue is full: wait until there is space (OVERFLOW_BLOCK),
+			drop the packet to be written (OVERFLOW_DROP_NEWEST) or drop the oldest packet
+			in the queue (OVERFLOW_DROP_OLDEST)
+		"""
+		self._writer = writer
+		self._queue = deque()
+		self._queue_size = queue_size
+		self._overflow = overflow
+		self._cond = threading.Condition()
+		self._closed = False
+		self._dropped = 0
+		self._written = 0
+		self._error = None
+		self._thread = threading.Thread(target=self._write_queued, daemon=True)
+		self._thread.start()
+
+	def _write_queued(self):
+		cond = self._cond
+
+		while True:
+			with cond:
+				while not self._queue and not self._closed:
+					cond.wait()
+
+				if not self._queue:
+					# closed and everything written
+					return
+				ts_bts_queued = self._queue
+				self._queue = deque()
+				# make space for blocking writers
+				cond.notify_all()
+
+			try:
+				self._writer.write_many(ts_bts_queued)
+				self._written += len(ts_bts_queued)
+
+				if not self._queue:
+					self._writer.flush()
+			except Exception as ex:
+				logger.exception(ex)
+				self._error = ex
+
+	def write(self, bts, ts=None):
+		"""
+		Queue the given packet's bytes for writing.
+
+		bts -- bytes to be written
+		ts -- timestamp in Nanoseconds, current time if None
+		return -- True if the packet was queued, False if it was dropped
+		"""
+		if ts is None:
+			ts = time.time_ns()
+
+		with self._cond:
+			if self._closed:
+				raise Exception("writer is closed")
+
+			if len(self._queue) >= self._queue_size:
+				if self._overflow == OVERFLOW_DROP_NEWEST:
+					self._dropped += 1
+					return False
+				elif self._overflow == OVERFLOW_DROP_OLDEST:
+					self._queue.popleft()
+					self._dropped += 1
+				else:
+					while len(self._queue) >= self._queue_size:
+						self._cond.wait()
+			self._queue.append((ts, bts))
+			self._cond.notify()
+		return True
+
+	def write_many(self, ts_bts_iterable):
+		"""
+		Queue multiple packets for writing.
+
+		ts_bts_iterable -- iterable of (timestamp_nanoseconds, bytes) like returned by Reader
+		"""
+		for ts, bts in ts_bts_iterable:
+			self.write(bts, ts=ts)
+
+	# amount of packets waiting to be written
+	queue_depth = property(lambda self: len(self._queue))
+	# amount of packets dropped because the queue was full
+	dropped = property(lambda self: self._dropped)
+	# amount of packets passed to the writer
+	written = property(lambda self: self._written)
+	# last exception raised by the writer in the background thread, None if there was none
+	error = property(lambda self: self._error)
+
+	def close(self):
+		"""Write all queued packets and close the writer."""
+		with self._cond:
+			self._closed = True
+			self._cond.notify_all()
+		self._thread.join()
+		self._writer.close()
+
+
 unpack_IIII_be = struct.Struct(">IIII").unpack
 unpack_IIII_le = struct.Struct("<IIII").unpack
+unpack_from_IIII_be = struct.Struct(">IIII").unpack_from
+unpack_from_IIII_le = struct.Struct("<IIII").unpack_from
 
 
 def _filter_dummy(pkt):
@@ -187,7 +768,8 @@ class Reader(object):
 	Default timestamp resolution ist nanoseconds.
 	"""
 
-	def __init__(self, fileobj=None, filename=None, lowest_layer=None, filter=None, ts_conversion=True):
+	def __init__(self, fileobj=None, filename=None, lowest_layer=None, filter=None, ts_conversion=True,
+		use_mmap=False, block_size=None, follow=False):
 		"""
 		Create a pcap Reader.
 
@@ -202,19 +784,68 @@ class Reader(object):
 			((seconds, [microseconds|nanoseconds]), buf) for __next__ and __iter__ instead of (timestamp, packet)
 			and saves ~2% computation time. Minor fraction type can be checked using "is_resolution_nano".
 			Note: This is deprecated and will be removed in future; conversion to nanoseconds will become the only option
+		use_mmap -- map the file into memory and return memoryviews of the mapped file instead
+			of bytes. This avoids read calls and copying packet data. Packets mode creates
+			packets from a bytes copy of the views. Views must be released before calling close().
+		block_size -- read the file in blocks of block_size bytes (eg BLOCK_SIZE_DEFAULT) and
+			extract records from them instead of reading every record header and data separately.
+			This needs far fewer read calls eg for network filesystems and pipes.
+			Compressed files (gzip, xz, bzip2) are detected via magic numbers if a filename
+			is given. They are decompressed in a background thread and read in blocks
+			(BLOCK_SIZE_DEFAULT if not given). Compressed files don't support seeking (reset, index etc)
+			and can't be read in mmap mode.
+		follow -- read a file which is still being written (eg by tcpdump or Writer): incomplete
+			records at the end of the file are not returned but read again later on and iterating
+			waits for new packets, see follow() and poll(). Can't be combined with mmap, block
+			mode or compressed files.
 		"""
+		if follow and (use_mmap or block_size is not None):
+			raise ValueError("follow mode can't be used with mmap or block mode")
 
 		# handle source modes
 		if fileobj is not None:
 			self.__fh = fileobj
+			# wrapped file objects like gzip.open(...) also have names: no sidecar index for them
+			filename = fileobj.name if isinstance(fileobj, (io.BufferedReader, io.FileIO)) else None
 		elif filename is not None:
 			self.__fh = open(filename, "rb")
+			compression = get_compression(self.__fh.read(6))
+			self.__fh.seek(0)
+
+			if compression is not None:
+				if follow or use_mmap:
+					self.__fh.close()
+					raise ValueError("follow and mmap mode can't be used with compressed files")
+				logger.info("reading %s compressed file" % compression)
+				self.__fh = open_compressed(self.__fh, compression)
+				# index is not available
+				filename = None
+
+				if block_size is None:
+					block_size = BLOCK_SIZE_DEFAULT
 		else:
 			raise Exception("No fileobject and no filename given..nothing to read!!!")
 
+		# needed for the sidecar index
+		self._filename = filename if type(filename) is str else None
+		# (offsets, timestamps) of all packets, see build_index()
+		self._index = None
+		# sparse (offsets, maximum timestamps, amount of packets), see _get_checkpoints()
+		self._checkpoints = None
+
+		# file header is skipped per default (needed for __next__), no seek: allow non-seekable files
 		buf = self.__fh.read(24)
-		# file header is skipped per default (needed for __next__)
-		self.__fh.seek(24)
+
+		if follow:
+			interval = FOLLOW_INTERVAL_MIN
+
+			# wait until file header is written
+			while len(buf) < 24:
+				time.sleep(interval)
+				interval = min(interval * 2, FOLLOW_INTERVAL_MAX)
+				buf += self.__fh.read(24 - len(buf))
+
+		self._follow = follow
 		# this is not needed anymore later on but we set it anyway
 		self.__fhdr = FileHdr(buf)
 		self._closed = False
@@ -224,21 +855,56 @@ class Reader(object):
 			self.__resolution_factor = 1000
 			# Note: we could use PktHdr to parse pre-packetdata but calling unpack directly
 			# greatly improves performance
-			self.__callback_unpack_meta = lambda x: unpack_IIII_be(x)
+			self.__callback_unpack_meta = unpack_IIII_be
+			self.__callback_unpack_from_meta = unpack_from_IIII_be
 		elif self.__fhdr.magic == TCPDUMP_MAGIC_NANO:
 			self.__resolution_factor = 1
-			self.__callback_unpack_meta = lambda x: unpack_IIII_be(x)
+			self.__callback_unpack_meta = unpack_IIII_be
+			self.__callback_unpack_from_meta = unpack_from_IIII_be
 		elif self.__fhdr.magic == TCPDUMP_MAGIC_SWAPPED:
 			self.__fhdr = LEFileHdr(buf)
 			self.__resolution_factor = 1000
-			self.__callback_unpack_meta = lambda x: unpack_IIII_le(x)
+			self.__callback_unpack_meta = unpack_IIII_le
+			self.__callback_unpack_from_meta = unpack_from_IIII_le
 		elif self.__fhdr.magic == TCPDUMP_MAGIC_NANO_SWAPPED:
 			self.__fhdr = LEFileHdr(buf)
 			self.__resolution_factor = 1
-			self.__callback_unpack_meta = lambda x: unpack_IIII_le(x)
+			self.__callback_unpack_meta = unpack_IIII_le
+			self.__callback_unpack_from_meta = unpack_from_IIII_le
 		else:
 			raise ValueError("invalid tcpdump header, magic value: %s" % self.__fhdr.magic)
 
+		# source of records: file object or mapped file
+		self._mmap = None
+
+		if use_mmap:
+			logger.info("using mmap mode")
+			self._mmap = mmap.mmap(self.__fh.fileno(), 0, access=mmap.ACCESS_READ)
+			self._mmap_view = memoryview(self._mmap)
+			self._mmap_pos = 24
+			self._read_record = self._read_record_mmap
+			self._tell = self._tell_mmap
+			self._seek = self._seek_mmap
+		elif block_size is not None:
+			logger.info("using block mode, block size: %d" % block_size)
+			self._block_size = block_size
+			self._block = b""
+			self._block_pos = 0
+			self._read_record = self._records_block().__next__
+			self._tell = self._tell_block
+			self._seek = self._seek_block
+
+			try:
+				# we read sequentially: allow the OS to read ahead more aggressively
+				os.posix_fadvise(self.__fh.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+			except (AttributeError, OSError, ValueError):
+				# not supported by OS or file object
+				pass
+		else:
+			self._read_record = self._read_record_follow if follow else self._read_record_file
+			self._tell = self.__fh.tell
+			self._seek = self.__fh.seek
+
 		logger.info("pcap file header for reading: %r" % self.__fhdr)
 
 		# logger.debug("timestamp factor: %s" % self.__resolution_factor)
@@ -268,14 +934,17 @@ class Reader(object):
 			else:
 				self._filter = filter
 
+	# file header of this pcap file: FileHdr or LEFileHdr
+	file_header = property(lambda self: self.__fhdr)
+
 	def is_resolution_nano(self):
 		return self.__resolution_factor == 1000
 
-	def _next_bytes_conversion(self):
+	def _read_record_file(self):
 		"""
-		Standard __next__ implementation. Needs to be a sepearte method to be called by producer.
+		Read the next record from the file object.
 
-		return -- (timestamp_nanoseconds, bytes) for pcap-reader.
+		return -- (record header values, bytes)
 		"""
 		# read metadata before actual packet
 		buf = self.__fh.read(16)
@@ -285,26 +954,118 @@ class Reader(object):
 
 		d = self.__callback_unpack_meta(buf)
 		# logger.debug("reading: input/pos/d[2] = %d/%d/%r" % (len(buf), self.__fh.tell(), d))
-		buf = self.__fh.read(d[2])
+		return d, self.__fh.read(d[2])
 
-		return (d[0] * 1000000000 + (d[1] * self.__resolution_factor), buf)
-
-	def _next_bytes_noconversion(self):
+	def _read_record_follow(self):
 		"""
-		Same as _next_bytes_conversion wihtout timestamp-conversion. (Duplicatet because of performance reasons.)
+		Read the next record from the file object. Incomplete records are not consumed.
 
-		return -- ((seconds, [microseconds|nanoseconds]), bytes) for pcap-reader.
+		return -- (record header values, bytes)
 		"""
-		# read metadata before actual packet
-		buf = self.__fh.read(16)
+		fh = self.__fh
+		pos = fh.tell()
+		buf = fh.read(16)
 
-		if not buf:
+		if len(buf) < 16:
+			# EOF or record header not yet completely written
+			fh.seek(pos)
 			raise StopIteration
 
 		d = self.__callback_unpack_meta(buf)
-		# logger.debug("reading: input/d[2] = %d/%d" % (len(buf), d[2]))
-		buf = self.__fh.read(d[2])
+		buf = fh.read(d[2])
+
+		if len(buf) < d[2]:
+			fh.seek(pos)
+			raise StopIteration
+		return d, buf
+
+	def _read_record_mmap(self):
+		"""
+		Read the next record from the mapped file.
+
+		return -- (record header values, memoryview)
+		"""
+		pos = self._mmap_pos
+
+		if pos + 16 > len(self._mmap):
+			raise StopIteration
+
+		d = self.__callback_unpack_from_meta(self._mmap, pos)
+		pos += 16
+		self._mmap_pos = pos + d[2]
+		return d, self._mmap_view[pos: pos + d[2]]
+
+	def _records_block(self):
+		"""
+		Read the file in blocks and extract records from them, records can span multiple blocks.
+		Current block and position are stored in _block and _block_pos.
+
+		return -- generator returning (record header values, bytes)
+		"""
+		fh_read = self.__fh.read
+		unpack_from_meta = self.__callback_unpack_from_meta
+		block_size = self._block_size
+		block = self._block
+		pos = self._block_pos
+		block_len = len(block)
+
+		while True:
+			if pos + 16 > block_len:
+				block = block[pos:] + fh_read(max(block_size, pos + 16 - block_len))
+				pos = 0
+				block_len = len(block)
+				self._block = block
+				self._block_pos = 0
+
+				if block_len < 16:
+					return
+
+			d = unpack_from_meta(block, pos)
+			end = pos + 16 + d[2]
+
+			if end > block_len:
+				# record spans multiple blocks
+				block = block[pos:] + fh_read(max(block_size, end - block_len))
+				end -= pos
+				pos = 0
+				block_len = len(block)
+				self._block = block
+
+			self._block_pos = end
+			yield d, block[pos + 16: end]
+			pos = end
+
+	def _tell_block(self):
+		return self.__fh.tell() - len(self._block) + self._block_pos
+
+	def _seek_block(self, pos):
+		self.__fh.seek(pos)
+		self._block = b""
+		self._block_pos = 0
+		self._read_record = self._records_block().__next__
+
+	def _tell_mmap(self):
+		return self._mmap_pos
+
+	def _seek_mmap(self, pos):
+		self._mmap_pos = pos
+
+	def _next_bytes_conversion(self):
+		"""
+		Standard __next__ implementation. Needs to be a sepearte method to be called by producer.
+
+		return -- (timestamp_nanoseconds, bytes) for pcap-reader.
+		"""
+		d, buf = self._read_record()
+		return (d[0] * 1000000000 + (d[1] * self.__resolution_factor), buf)
+
+	def _next_bytes_noconversion(self):
+		"""
+		Same as _next_bytes_conversion wihtout timestamp-conversion.
 
+		return -- ((seconds, [microseconds|nanoseconds]), bytes) for pcap-reader.
+		"""
+		d, buf = self._read_record()
 		# return ((hdr.tv_sec, hdr.tv_usec), buf)
 		return ((d[0], d[1]), buf)
 
@@ -318,7 +1079,12 @@ class Reader(object):
 			ts_bts = self._next_bytes()
 
 			try:
-				pkt = self._lowest_layer(ts_bts[1])
+				if self._mmap is None:
+					pkt = self._lowest_layer(ts_bts[1])
+				else:
+					# packets keep their raw bytes: create from a copy
+					ts_bts = (ts_bts[0], bytes(ts_bts[1]))
+					pkt = self._lowest_layer(ts_bts[1])
 
 				if self._filter(pkt):
 					return (ts_bts[0], pkt)
@@ -331,22 +1097,383 @@ class Reader(object):
 		return -- (timestamp, [bytes|packet]) for pcap-reader depending on configuration.
 		"""
 		if self._closed:
-			raise StopIteration
+			return
+
+		if self._follow:
+			yield from self.follow()
+			return
 
 		while True:
 			# loop until EOF is reached (raises StopIteration)
-			yield self.__next__()
+			try:
+				yield self.__next__()
+			except StopIteration:
+				return
+
+	def poll(self, max_amount=None):
+		"""
+		Read all packets completely written until now without waiting for new ones.
+
+		max_amount -- maximum amount of packets to return, None for no limit
+		return -- list of (timestamp, [bytes|packet]), empty if there are no new packets
+		"""
+		packets = []
+		next_packet = self.__next__
+
+		while max_amount is None or len(packets) < max_amount:
+			try:
+				packets.append(next_packet())
+			except StopIteration:
+				break
+		return packets
+
+	def follow(self, timeout=None, interval_min=FOLLOW_INTERVAL_MIN, interval_max=FOLLOW_INTERVAL_MAX):
+		"""
+		Iterate over packets and wait for new ones when reaching the end of the file like "tail -f",
+		see parameter follow of Reader. The waiting interval starts at interval_min and gets doubled up to interval_max
+		as long as there are no new packets.
+
+		timeout -- stop if there were no new packets for this amount of seconds, None to wait
+			until the reader gets closed
+		return -- iterator of (timestamp, [bytes|packet])
+		"""
+		next_packet = self.__next__
+		interval = interval_min
+		time_last = time.monotonic()
+
+		while not self._closed:
+			try:
+				ts_pkt = next_packet()
+			except StopIteration:
+				if timeout is not None and time.monotonic() - time_last >= timeout:
+					return
+				time.sleep(interval)
+				interval = min(interval * 2, interval_max)
+				continue
+
+			interval = interval_min
+			time_last = time.monotonic()
+			yield ts_pkt
 
 	def reset(self):
 		"""
 		Reset file pointer to beginning
 		"""
-		self.__fh.seek(24)
+		self._seek(24)
+
+	def iter_raw(self):
+		"""
+		Iterate over complete records (header and data) as stored in file starting at the current
+		read position. This avoids any conversion, see Writer.write_raw().
+
+		return -- iterator returning bytes of every record
+		"""
+		fh = self.__fh
+		unpack_from_meta = self.__callback_unpack_from_meta
+		pos_file = self._tell()
+		fh.seek(pos_file)
+		block = b""
+		pos = 0
+
+		try:
+			while True:
+				if pos + 16 > len(block):
+					block = block[pos:] + fh.read(BLOCK_SIZE_DEFAULT)
+					pos = 0
+
+					if len(block) < 16:
+						break
+
+				end = pos + 16 + unpack_from_meta(block, pos)[2]
+
+				if end > len(block):
+					# record spans multiple blocks
+					block = block[pos:] + fh.read(max(BLOCK_SIZE_DEFAULT, end - len(block)))
+					end -= pos
+					pos = 0
+
+				record = block[pos: end]
+				pos_file += len(record)
+				yield record
+				pos = end
+		finally:
+			# continue reading after the last returned record, also if iteration stopped early
+			self._seek(pos_file)
+
+	def _get_index_filename(self):
+		if self._filename is None:
+			return None
+		return self._filename + INDEX_FILE_SUFFIX
+
+	def _iter_meta(self, offset=24):
+		"""
+		Read record headers (data is skipped) starting at the record at file offset. The file
+		position is changed, callers have to restore it.
+
+		offset -- file offset of a record
+		return -- iterator of (offset, timestamp_nanoseconds) of every record
+		"""
+		fh = self.__fh
+		unpack_from_meta = self.__callback_unpack_from_meta
+		resolution_factor = self.__resolution_factor
+		fh.seek(offset)
+		# file offset of block[0]
+		block_off = offset
+		block = b""
+		pos = 0
+
+		while True:
+			if pos + 16 > len(block):
+				block = block[pos:] + fh.read(BLOCK_SIZE_DEFAULT)
+				block_off += pos
+				pos = 0
+
+				if len(block) < 16:
+					break
+
+			d = unpack_from_meta(block, pos)
+			yield block_off + pos, d[0] * 1000000000 + d[1] * resolution_factor
+			pos += 16 + d[2]
+
+			if pos > len(block):
+				# skip data outside of this block
+				fh.seek(pos - len(block), 1)
+				block_off += pos
+				block = b""
+				pos = 0
+
+	def _scan_index(self):
+		"""
+		Read all record headers to get offsets and timestamps of all packets.
+		The file position is reset afterwards.
+
+		return -- (offsets, timestamps_nanoseconds) as array.array("Q")
+		"""
+		offsets = array.array("Q")
+		timestamps = array.array("Q")
+		oldpos = self._tell()
+
+		try:
+			for off, ts in self._iter_meta():
+				offsets.append(off)
+				timestamps.append(ts)
+		finally:
+			self._seek(oldpos)
+		return offsets, timestamps
+
+	def _load_index(self, filename_index):
+		"""
+		Load the index from the sidecar file if it's still valid for the pcap file.
+
+		return -- (offsets, timestamps_nanoseconds) or None if not available
+		"""
+		offsets = array.array("Q")
+		timestamps = array.array("Q")
+
+		try:
+			stat = os.stat(self._filename)
+
+			with open(filename_index, "rb") as fh_index:
+				magic, version, byteorder, size, mtime, amount = _index_hdr.unpack(fh_index.read(_index_hdr.size))
+
+				if magic != INDEX_MAGIC or version != INDEX_VERSION or size != stat.st_size or\
+					mtime != stat.st_mtime_ns or\
+					os.fstat(fh_index.fileno()).st_size != _index_hdr.size + amount * 16:
+					logger.info("outdated or invalid index, ignoring: %s" % filename_index)
+					return None
+				# read directly into the arrays: no temporary copy
+				offsets.fromfile(fh_index, amount)
+				timestamps.fromfile(fh_index, amount)
+		except (OSError, EOFError, struct.error):
+			return None
+
+		if byteorder != (sys.byteorder == "big"):
+			offsets.byteswap()
+			timestamps.byteswap()
+		return offsets, timestamps
+
+	def build_index(self, save=False):
+		"""
+		Build the index of packet offsets and timestamps used by seek_packet(), get_by_indices()
+		and slicing. This is done automatically (in memory) on first use. An existing sidecar
+		file "<pcap filename>.pidx" is reused as long as the pcap file is unchanged.
+
+		save -- store the index in the sidecar file if possible
+		"""
+		filename_index = self._get_index_filename()
+		self._index = None
+		self._checkpoints = None
+
+		if filename_index is not None:
+			self._index = self._load_index(filename_index)
+
+		if self._index is not None:
+			logger.info("loaded index: %s" % filename_index)
+			return
+
+		self._index = self._scan_index()
+
+		if not save or filename_index is None:
+			return
+
+		offsets, timestamps = self._index
+		stat = os.stat(self._filename)
+		hdr = _index_hdr.pack(INDEX_MAGIC, INDEX_VERSION, int(sys.byteorder == "big"),
+			stat.st_size, stat.st_mtime_ns, len(offsets))
+
+		try:
+			with open(filename_index, "wb") as fh_index:
+				fh_index.write(hdr)
+				offsets.tofile(fh_index)
+				timestamps.tofile(fh_index)
+		except OSError as ex:
+			logger.warning("could not write index file %s: %r" % (filename_index, ex))
+
+	def _get_index(self):
+		if self._index is None:
+			self.build_index()
+		return self._index
+
+	def seek_packet(self, idx):
+		"""
+		Set the read position to the packet at position idx, the next call of __next__ will
+		return this packet. Raises IndexError if the packet does not exist.
+
+		idx -- position of the packet starting at 0 for the first packet, negative values
+			count from the last packet
+		"""
+		self._seek(self._get_index()[0][idx])
+
+	def _get_checkpoints(self):
+		"""
+		return -- (offsets, timestamps_max, amount): file offsets of every CHECKPOINT_INTERVAL-th
+			packet, maximum timestamps of all packets until the end of the block of packets
+			starting at these offsets and the amount of packets. Taken from the index if
+			available, else record headers are read without keeping the full index.
+		"""
+		if self._checkpoints is None:
+			offsets_cp = array.array("Q")
+			timestamps_max = []
+			amount = 0
+			oldpos = self._tell()
+
+			try:
+				meta = zip(*self._index) if self._index is not None else self._iter_meta()
+
+				for off, ts in meta:
+					if amount % CHECKPOINT_INTERVAL == 0:
+						offsets_cp.append(off)
+						timestamps_max.append(ts if amount == 0 else max(timestamps_max[-1], ts))
+					elif ts > timestamps_max[-1]:
+						timestamps_max[-1] = ts
+					amount += 1
+			finally:
+				self._seek(oldpos)
+			self._checkpoints = (offsets_cp, timestamps_max, amount)
+		return self._checkpoints
+
+	def _get_position_by_time(self, ts):
+		"""
+		return -- (position, offset) of the first packet having a timestamp >= ts while all packets
+			before it have a timestamp < ts, (amount of packets, None) if there is no such packet
+		"""
+		offsets_cp, timestamps_max, amount = self._get_checkpoints()
+		# first block of packets having a maximum timestamp >= ts
+		block_idx = bisect.bisect_left(timestamps_max, ts)
+
+		if block_idx >= len(timestamps_max):
+			return amount, None
+
+		# packets before this block all have timestamps < ts: scan this block
+		pos = block_idx * CHECKPOINT_INTERVAL
+		oldpos = self._tell()
+
+		try:
+			for off, ts_record in self._iter_meta(offsets_cp[block_idx]):
+				if ts_record >= ts:
+					return pos, off
+				pos += 1
+		finally:
+			self._seek(oldpos)
+
+	def seek_time(self, ts):
+		"""
+		Set the read position to the first packet having a timestamp >= ts. Searching is done via
+		sparse checkpoints (every CHECKPOINT_INTERVAL packets) followed by a short scan of record
+		headers. Captures are assumed to be sorted by time: every packet before the new position
+		has a timestamp < ts but packets after it can still have smaller timestamps.
+
+		ts -- timestamp in nanoseconds
+		return -- position of the packet, amount of packets if all timestamps are < ts
+		"""
+		pos, off = self._get_position_by_time(ts)
+
+		if off is not None:
+			self._seek(off)
+		else:
+			self._seek(os.fstat(self.__fh.fileno()).st_size)
+		return pos
+
+	def range(self, ts_start, ts_end):
+		"""
+		Iterate over all packets having a timestamp ts_start <= timestamp < ts_end using
+		seek_time(). Only packets between the positions found for ts_start and ts_end are read.
+		This changes the current read-pointer.
+
+		ts_start, ts_end -- timestamps in nanoseconds
+		return -- iterator returning (timestamp, [bytes|packets])
+		"""
+		pos_end = self._get_position_by_time(ts_end)[0]
+		pos_start = self.seek_time(ts_start)
+		resolution_factor = self.__resolution_factor
+		ts_conversion = self._next_bytes == self._next_bytes_conversion
+
+		for _ in range(pos_start, pos_end):
+			d, buf = self._read_record()
+			ts = d[0] * 1000000000 + d[1] * resolution_factor
+
+			if not ts_start <= ts < ts_end:
+				continue
+
+			ts_bts = (ts if ts_conversion else (d[0], d[1]), buf)
+
+			if self._mode == _MODE_PACKETS:
+				if self._mmap is not None:
+					ts_bts = (ts_bts[0], bytes(buf))
+				pkt = self._lowest_layer(ts_bts[1])
+
+				if not self._filter(pkt):
+					continue
+				ts_bts = (ts_bts[0], pkt)
+			yield ts_bts
+
+	def _read_by_indices(self, indices):
+		"""
+		return -- list of (timestamp, [bytes|packets]) read via the index at positions given
+			by indices, positions need to be valid. Filters are not applied.
+		"""
+		offsets = self._get_index()[0]
+		oldpos = self._tell()
+		data_ret = []
+
+		for idx in indices:
+			self._seek(offsets[idx])
+			ts_bts = self._next_bytes()
+
+			if self._mode == _MODE_PACKETS:
+				if self._mmap is not None:
+					ts_bts = (ts_bts[0], bytes(ts_bts[1]))
+				ts_bts = (ts_bts[0], self._lowest_layer(ts_bts[1]))
+			data_ret.append(ts_bts)
+
+		self._seek(oldpos)
+		return data_ret
 
 	def get_by_indices(self, indices):
 		"""
 		Return [(timestamp, [bytes|packets]), ...] for the specified indices in packet file
 		starting at 0 for first packet. This method won't change the current read-pointer.
+		Packets are read via the index (see build_index()) unless a filter is used in packets mode.
 
 		indices -- set of indices like set([0, 1, 2]). Nonexistent indices will be ignored.
 		return -- list of (timestamp, [bytes|packets]) at positions given by indices (ordered as in packet source)
@@ -354,11 +1481,16 @@ class Reader(object):
 		if self._closed:
 			return []
 
+		if self._mode == _MODE_BYTES or self._filter is _filter_dummy:
+			amount = len(self._get_index()[0])
+			return self._read_by_indices(sorted([idx for idx in set(indices) if 0 <= idx < amount]))
+
+		# positions relate to filtered packets: read all packets
 		if type(indices) is list:
 			indices = set(indices)
 
-		oldpos = self.__fh.tell()
-		self.__fh.seek(24)
+		oldpos = self._tell()
+		self._seek(24)
 		data_ret = []
 		pos = 0
 
@@ -367,9 +1499,106 @@ class Reader(object):
 				data_ret.append(data)
 			pos += 1
 
-		self.__fh.seek(oldpos)
+		self._seek(oldpos)
 		return data_ret
 
+	def __getitem__(self, idx):
+		"""
+		Get packets via index (see build_index()) without changing the current read-pointer.
+
+		idx -- packet position (starting at 0, negative values count from the last packet) or slice
+		return -- (timestamp, [bytes|packets]) or list of them for slices
+		"""
+		amount = len(self._get_index()[0])
+
+		if type(idx) is slice:
+			return self._read_by_indices(range(*idx.indices(amount)))
+
+		if idx < 0:
+			idx += amount
+		if not 0 <= idx < amount:
+			raise IndexError("packet index out of range: %d" % idx)
+		return self._read_by_indices([idx])[0]
+
 	def close(self):
 		self._closed = True
+
+		if self._mmap is not None:
+			self._mmap_view.release()
+
+			try:
+				self._mmap.close()
+			except BufferError:
+				# views still in use, mapping is released on garbage collection
+				logger.warning("can't close mapped file, views are still in use")
 		self.__fh.close()
+
+
+def merge(*sources):
+	"""
+	Merge packets of multiple sources ordered by timestamp like mergecap does. Sources have
+	to be ordered by timestamp themselves. Only one packet per source is kept in memory.
+	Packets having the same timestamp are returned in order of their sources.
+
+	sources -- Reader (using timestamp conversion) or any iterable returning
+		(timestamp_nanoseconds, ..., bytes) like a pcapng stream reader
+	return -- iterator of (timestamp_nanoseconds, [bytes|packet])
+	"""
+	heap = []
+
+	for idx, source in enumerate(sources):
+		it = iter(source)
+
+		for item in it:
+			heap.append((item[0], idx, item[-1], it))
+			break
+	heapq.heapify(heap)
+	heapreplace = heapq.heapreplace
+	heappop = heapq.heappop
+
+	while heap:
+		ts, idx, data, it = heap[0]
+
+		for item in it:
+			heapreplace(heap, (item[0], idx, item[-1], it))
+			break
+		else:
+			heappop(heap)
+		yield ts, data
+
+
+def merge_files(filenames, filename_out, **writer_kwargs):
+	"""
+	Merge pcap files ordered by timestamp into a new pcap file. All files need the same linktype.
+	Snaplen (maximum of all files), linktype and timestamp resolution (of the first file)
+	are taken from the input files if not given.
+
+	filenames -- list of input pcap filenames, can be compressed
+	filename_out -- filename of the merged file
+	writer_kwargs -- additional parameters for Writer like ts_resolution_nano
+	"""
+	readers = []
+
+	try:
+		for filename in filenames:
+			readers.append(Reader(filename=filename))
+
+		file_headers = [reader.file_header for reader in readers]
+		linktypes = set(fh.linktype for fh in file_headers)
+
+		if len(linktypes) > 1:
+			raise ValueError("can't merge files having different linktypes: %r" % sorted(linktypes))
+
+		writer_kwargs.setdefault("snaplen", max(fh.snaplen for fh in file_headers))
+		writer_kwargs.setdefault("linktype", file_headers[0].linktype)
+		writer_kwargs.setdefault("ts_resolution_nano",
+			file_headers[0].magic in (TCPDUMP_MAGIC_NANO, TCPDUMP_MAGIC_NANO_SWAPPED))
+		writer = Writer(filename=filename_out, **writer_kwargs)
+
+		try:
+			writer.write_many(merge(*readers))
+		finally:
+			writer.close()
+	finally:
+		for reader in readers:
+			reader.close()
@@ -1,6 +1,6 @@
 """Packet read and write routines using network sockets."""
 
-from pypacker import pypacker
+from pypacker import pypacker, checksum
 from pypacker.layer12 import ethernet
 
 import socket
@@ -22,7 +22,8 @@ class SocketHndl(object):
 				mode=MODE_LAYER_2,
 				timeout=3,
 				buffersize_recv=None,
-				buffersize_send=None):
+				buffersize_send=None,
+				checksum_offload=None):
 		"""
 		iface_name -- bind to the given interface, mainly for MODE_LAYER_2
 		mode -- set socket-mode for sending data (used by send() and sr()). The following modes are supported:
@@ -30,12 +31,15 @@ class SocketHndl(object):
 			MODE_LAYER_3: send layer 3 packets (eg. IP, ARP) and receive layer 2 packets
 		timeout -- read timeout in seconds
 		buffersize_recv, buffersize_send -- amount of bytes used for receiving and sending
+		checksum_offload -- checksum offloading mode (checksum.OFFLOAD_XXX) used for packets
+			sent via sendp() and sr(), None to use the process wide setting (see checksum.set_offload())
 		"""
 
 		self.iface_name = iface_name
 		self._socket_send = None
 		self._socket_recv = None
 		self.__mode = mode
+		self.checksum_offload = checksum_offload
 
 		logger.info("creating socket on interface: %s" % iface_name)
 		# use raw socket for receiving in all modes
@@ -76,6 +80,32 @@ class SocketHndl(object):
 		elif self.__mode == SocketHndl.MODE_LAYER_3:
 			self._socket_send.sendto(bts, (dst, 0))
 
+	def _packet_to_bytes(self, packet):
+		"""
+		return -- bytes of packet using the checksum offloading mode of this socket
+		"""
+		if self.checksum_offload is None:
+			return packet.bin()
+		# only affects this thread: other threads can create packets in the meantime
+		mode_old = checksum.set_offload_thread(self.checksum_offload)
+
+		try:
+			return packet.bin()
+		finally:
+			checksum.set_offload_thread(mode_old)
+
+	def sendp(self, packet_send, dst=None):
+		"""
+		Send the given packet to network. Checksums are handled like
+		configured via checksum_offload.
+
+		packet_send -- pypacker packet to be sent
+		dst -- destination for Layer 3 if mode is MODE_LAYER_3, default: packet_send.dst_s
+		"""
+		if self.__mode == SocketHndl.MODE_LAYER_3 and dst is None:
+			dst = packet_send.dst_s
+		self.send(self._packet_to_bytes(packet_send), dst=dst)
+
 	def recv(self, size=65536):
 		"""
 		return -- bytes received from network
@@ -167,11 +197,7 @@ class SocketHndl(object):
 		received = []
 		packet_send_clz = packet_send.__class__
 
-		if self.__mode == SocketHndl.MODE_LAYER_2:
-			self.send(packet_send.bin())
-		elif self.__mode == SocketHndl.MODE_LAYER_3:
-			# logger.debug("sr with layer 3: %s" % packet_send.dst_s)
-			self.send(packet_send.bin(), dst=packet_send.dst_s)
+		self.sendp(packet_send)
 
 		while len(received) < max_packets_recv:
 			bts = self.recv()
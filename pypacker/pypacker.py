@@ -501,6 +501,38 @@ class Packet(object, metaclass=pypacker_meta.MetaPacket):
 			# no handler present
 			pass
 
+	def verify_checksums(self):
+		"""
+		Verify checksums of this and all upper layers using the current header and body bytes.
+		Checksums won't get updated and change states stay untouched.
+
+		return -- [(layer, True|False), ...] for all layers having a checksum
+		"""
+		layers = [layer for layer in self]
+		# packing headers resets the changed state
+		changed_states = [(layer._header_changed, layer._body_changed) for layer in layers]
+		results = []
+
+		for layer in layers:
+			result = layer._verify_sum()
+
+			if result is not None:
+				results.append((layer, result))
+
+		for layer, (header_changed, body_changed) in zip(layers, changed_states):
+			layer._header_changed = header_changed
+			layer._body_changed = body_changed
+		return results
+
+	def _verify_sum(self):
+		"""
+		Verify the checksum of this layer. Called by verify_checksums(), to be overwritten
+		by layers having a checksum.
+
+		return -- True if checksum is correct, False if not, None if there is no checksum or it can't be verified
+		"""
+		return None
+
 	def __add__(self, packet_to_add):
 		"""
 		Handle concatination of layers like "Ethernet + IP + TCP" and make them accessible
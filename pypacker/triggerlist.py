@@ -60,6 +60,10 @@ class TriggerList(list):
 		self._lazy_dissect()
 		return super().__getitem__(pos)
 
+	def __iter__(self):
+		self._lazy_dissect()
+		return super().__iter__()
+
 	def __iadd__(self, v):
 		"""Item can be added using '+=', use 'append()' instead."""
 		self._lazy_dissect()
@@ -736,6 +736,21 @@ class IP6TestCase(unittest.TestCase):
 		self.assertEqual(ip_6.opts[0].opts[0].type, 5)
 		self.assertEqual(ip_6.opts[0].opts[1].type, 1)
 
+		# hop-by-hop + routing + AH: upper layer found without creating extension headers
+		hopopts = b"\x2b\x00\x01\x02\x00\x00\x00\x00"
+		routing = b"\x33\x02\x00\x01\x00\x00\x00\x00" + b"\x11" * 16
+		ah = b"\x06\x04\x00\x00" + b"\x00" * 20
+		tcp_bts = tcp.TCP(sport=1, dport=2).bin()
+		s = b"\x60\x00\x00\x00\x00\x4c\x00\x40" + b"\x01" * 16 + b"\x02" * 16 + hopopts + routing + ah + tcp_bts
+		ip_6 = ip6.IP6(s)
+		self.assertEqual(ip_6.header_len, 40 + 8 + 24 + 24)
+		self.assertEqual(ip_6.tcp.dport, 2)
+		self.assertEqual(type(ip_6._opts), list)
+		self.assertEqual(len(ip_6.opts), 3)
+		self.assertEqual(ip_6.opts[1].addresses[0], b"\x11" * 16)
+		self.assertEqual(ip_6.opts[2].nxt, 6)
+		self.assertEqual(ip_6.bin(), s)
+
 
 class ChecksumTestCase(unittest.TestCase):
 	def test_in_checksum(self):
@@ -750,6 +765,135 @@ class ChecksumTestCase(unittest.TestCase):
 		print(len(udp))
 		csum = checksum.in_cksum(pseudoheader + udp)
 		self.assertEqual(csum, 0x32bf)
+		# multiple buffers, odd lengths in between
+		csum = checksum.in_cksum([pseudoheader, udp[:9], udp[9:20], udp[20:]])
+		self.assertEqual(csum, 0x32bf)
+		csum = checksum.in_cksum(memoryview(pseudoheader + udp))
+		self.assertEqual(csum, 0x32bf)
+		# odd length: padded with zero byte
+		self.assertEqual(checksum.in_cksum(b"\x01\x02\x03"), checksum.in_cksum(b"\x01\x02\x03\x00"))
+		self.assertEqual(checksum.in_cksum(b"\x01\x02\x03"), 0xfbfd)
+		self.assertEqual(checksum.in_cksum(b"\x00" * 1500), 0xffff)
+		self.assertEqual(checksum.in_cksum(b"\xff" * 9000), 0x0000)
+
+	def test_in_checksum_batch(self):
+		print_header("Internet checksum batch")
+		bufs = [b"", b"\x01\x02\x03", b"\xff" * 9000, b"\x00" * 1500] + get_pcap("tests/packets_dns.pcap")
+		csums = [checksum.in_cksum(buf) for buf in bufs]
+		self.assertEqual(checksum.in_cksum_batch(bufs), csums)
+		self.assertEqual(checksum._in_cksum_batch_python(bufs), csums)
+		# one buffer plus offsets
+		offsets = []
+		off = 0
+
+		for buf in bufs:
+			offsets.append((off, off + len(buf)))
+			off += len(buf)
+		self.assertEqual(checksum.in_cksum_batch(b"".join(bufs), offsets), csums)
+		self.assertEqual(checksum.in_cksum_batch([]), [])
+
+	@unittest.skipUnless(checksum.numpy is not None, "NumPy not installed")
+	def test_in_checksum_batch_numpy(self):
+		print_header("Internet checksum batch NumPy")
+		rnd = random.Random(1)
+		bufs = [bytes(rnd.getrandbits(8) for _ in range(rnd.randint(0, 300))) for _ in range(200)]
+		bufs += [b"", b"\xff", b"\xff" * 9001, b""]
+		csums = [checksum.in_cksum(buf) for buf in bufs]
+		self.assertTrue(any(len(buf) & 1 for buf in bufs))
+		self.assertEqual(checksum._in_cksum_batch_numpy(bufs), csums)
+		offsets = []
+		off = 0
+
+		for buf in bufs:
+			offsets.append((off, off + len(buf)))
+			off += len(buf)
+		self.assertEqual(checksum._in_cksum_batch_numpy(b"".join(bufs), offsets), csums)
+
+	def test_verify_checksums(self):
+		print_header("verify checksums")
+		eth = ethernet.Ethernet(get_pcap("tests/packets_dns.pcap", 1)[0])
+		results = eth.verify_checksums()
+		self.assertEqual([(layer.__class__, ok) for layer, ok in results], [(ip.IP, True), (udp.UDP, True)])
+		eth = ethernet.Ethernet(get_pcap("tests/packets_icmp.pcap", 1)[0])
+		self.assertEqual([ok for _, ok in eth.verify_checksums()], [True, True])
+		eth = ethernet.Ethernet(get_pcap("tests/packets_diameter.pcap", 1)[0])
+		self.assertEqual([ok for _, ok in eth.verify_checksums()], [True, True])
+
+		# changes are not undone, checksums don't get updated
+		eth = ethernet.Ethernet(get_pcap("tests/packets_telnet.pcap", 1)[0])
+		self.assertEqual([ok for _, ok in eth.verify_checksums()], [True, True])
+		eth[ip.IP].ttl += 1
+		eth[tcp.TCP].win += 1
+		sum_ip, sum_tcp = eth[ip.IP].sum, eth[tcp.TCP].sum
+		self.assertEqual([ok for _, ok in eth.verify_checksums()], [False, False])
+		self.assertEqual((eth[ip.IP].sum, eth[tcp.TCP].sum), (sum_ip, sum_tcp))
+		self.assertTrue(eth[ip.IP]._header_changed)
+		eth.bin()
+		self.assertEqual([ok for _, ok in eth.verify_checksums()], [True, True])
+
+	def test_checksum_offload(self):
+		print_header("checksum offload")
+		pkt = ethernet.Ethernet() + ip.IP(src_s="192.168.0.1", dst_s="192.168.0.2") + tcp.TCP(body_bytes=b"abc")
+		mode_old = checksum.set_offload(checksum.OFFLOAD_SKIP)
+		self.assertEqual(mode_old, checksum.OFFLOAD_NONE)
+
+		try:
+			pkt.bin()
+			self.assertEqual((pkt[ip.IP].sum, pkt[tcp.TCP].sum), (0, 0))
+			checksum.set_offload(checksum.OFFLOAD_PARTIAL)
+			pkt[tcp.TCP].win = 1
+			pkt.bin()
+			pseudoheader = pkt[ip.IP].src + pkt[ip.IP].dst + b"\x00\x06" + struct.pack(">H", 23)
+			self.assertEqual(pkt[tcp.TCP].sum, checksum.in_cksum_partial(pseudoheader))
+			self.assertEqual([ok for _, ok in pkt.verify_checksums()], [True, False])
+		finally:
+			checksum.set_offload(mode_old)
+		pkt[tcp.TCP].win = 2
+		pkt.bin()
+		self.assertEqual([ok for _, ok in pkt.verify_checksums()], [True, True])
+
+		# per thread mode doesn't affect other threads
+		import threading
+		modes = []
+		mode_old = checksum.set_offload_thread(checksum.OFFLOAD_SKIP)
+		self.assertIsNone(mode_old)
+
+		try:
+			thread = threading.Thread(target=lambda: modes.append(checksum.get_offload()))
+			thread.start()
+			thread.join()
+			self.assertEqual(modes, [checksum.OFFLOAD_NONE])
+			self.assertEqual(checksum.get_offload(), checksum.OFFLOAD_SKIP)
+			pkt[tcp.TCP].win = 3
+			pkt.bin()
+			# IP header is unchanged
+			self.assertEqual([ok for _, ok in pkt.verify_checksums()], [True, False])
+		finally:
+			checksum.set_offload_thread(mode_old)
+		self.assertEqual(checksum.get_offload(), checksum.OFFLOAD_NONE)
+
+	def test_crc32c_checksum(self):
+		print_header("CRC-32c checksum")
+		# RFC 3720, B.4: check value is 0xE3069283, stored in network byte order
+		self.assertEqual(checksum.crc32_cksum(b"123456789"), 0x839206e3)
+		self.assertEqual(checksum.crc32_cksum([b"1234", b"", b"56789"]), 0x839206e3)
+
+		bts = bytes(range(256)) * 3 + b"\x01\x02\x03"
+		crc_bytewise = checksum.crc32_add_bytewise(0xFFFFFFFF, bts)
+
+		crc32_add_orig = checksum.crc32_add
+
+		try:
+			for name, crc32_add in checksum.CRC32_IMPLEMENTATIONS.items():
+				self.assertEqual(crc32_add(0xFFFFFFFF, bts), crc_bytewise)
+				# incremental update
+				crc = crc32_add(0xFFFFFFFF, bts[:13])
+				self.assertEqual(crc32_add(crc, memoryview(bts)[13:]), crc_bytewise)
+				checksum.set_crc32_implementation(name)
+				self.assertEqual(checksum.crc32_cksum(bts), checksum.crc32_done(crc_bytewise))
+			self.assertRaises(ValueError, checksum.set_crc32_implementation, "unknown")
+		finally:
+			checksum.crc32_add = crc32_add_orig
 
 	def test_fletcher_checksum(self):
 		print_header("fletcher checksum")
@@ -772,6 +916,15 @@ class ChecksumTestCase(unittest.TestCase):
 		csum = checksum.fletcher32(bts, 2)
 		self.assertEqual(csum, 16711935)
 
+		# multiple blocks of 359 words
+		bts = bytes(range(256)) * 6
+		self.assertEqual(checksum.fletcher32(bts, 768), 3739320702)
+		self.assertEqual(checksum.fletcher32(bts, 700), 2184029020)
+		# not enough data
+		self.assertRaises(ValueError, checksum.fletcher32, b"\x01\x02\x03\x04", 3)
+		self.assertRaises(ValueError, checksum.fletcher32, b"\x01\x02\x03", 2)
+		self.assertEqual(checksum.fletcher32(b"\x00\x00\x00\x01\x02", 2), 65537)
+
 
 class HTTPTestCase(unittest.TestCase):
 	def test_HTTP(self):
@@ -1145,6 +1298,22 @@ class DNSTestCase(unittest.TestCase):
 		self.assertEqual(len(dns3.auths), 1)
 		self.assertEqual(len(dns3.addrecords), 0)
 
+		# lazy dissecting and name compression
+		dns4 = ethernet.Ethernet(packet_bytes[1])[dns.DNS]
+		self.assertEqual(dns4.qname_s, "www.google.de.")
+		self.assertEqual(dns4.qname, b"\x03www\x06google\x02de\x00")
+		self.assertEqual(dns4.qtype, dns.DNS_A)
+		self.assertEqual(type(dns4._queries), list)
+		self.assertEqual(type(dns4._answers), list)
+		self.assertEqual([answer.name_s for answer in dns4.answers], ["www.google.de."] * 3)
+		self.assertEqual(dns4.answers[0].name, b"\xc0\x0c")
+		self.assertEqual(dns3.auths[0].name_s, "linux.com.")
+		self.assertEqual(dns3.auths[0].server_s, "ns1.linux-foundation.org.")
+		self.assertEqual(dns.dns_name_decompress(b"\x00" * 12 + b"\x03www\x04test\x00\x03abc\xc0\x10", 22, cache={}),
+			b"\x03abc\x04test\x00")
+		# pointer loop
+		self.assertEqual(dns.dns_name_decompress(b"\x03abc\xc0\x00", 0, cache={}), b"\x03abc" * (dns._DNS_NAME_POINTERS_MAX + 1))
+
 		dns_string = "www.test1.test2.de."
 		dns_bytes = b"\x03www\x05test1\x05test2\x02de\x00"
 		dns3.queries[0].name_s = dns_string
@@ -1236,6 +1405,62 @@ class SCTPTestCase(unittest.TestCase):
 		sct2.chunks.append((sctp.DATA, 0xff, b"\x00\x01\x02\x03"))
 		self.assertEqual(len(sct2.chunks), 1)
 
+		# chunks are only created on access
+		sct = ethernet.Ethernet(sct1_bytes)[sctp.SCTP]
+		self.assertEqual(sct.chunk_index, [(sctp.DATA, 0, 92)])
+		self.assertEqual(type(sct._chunks), list)
+		chunk = sct.chunks[0]
+		self.assertEqual(type(chunk), sctp.DataChunk)
+		self.assertEqual(chunk.ppid, sctp.PPID_H248)
+		self.assertEqual(chunk.stream_seq, 0xa0bd)
+		self.assertEqual(chunk.body_bytes[:8], b"MEGACO/2")
+		self.assertEqual(len(chunk.bin()), 92)
+
+		# checksum of a valid packet
+		eth_ip_sct = ethernet.Ethernet(get_pcap("tests/packets_diameter.pcap")[0])
+		sct = eth_ip_sct[sctp.SCTP]
+		sum_orig = sct.sum
+		sct.vtag = sct.vtag
+		self.assertEqual(sct.bin()[8:12], struct.pack(">I", sum_orig))
+
+		# bundled DATA chunks, payload dispatched by PPID
+		dia_bytes = diameter.Diameter().bin()
+		sct = sctp.SCTP(sport=3868, dport=3868)
+		sct.chunks.extend([
+			sctp.DataChunk(ppid=sctp.PPID_DIAMETER) + diameter.Diameter(),
+			sctp.DataChunk(tsn=1, body_bytes=b"\x01\x02\x03")
+		])
+		sct_bytes = sct.bin()
+		sct2 = sctp.SCTP(sct_bytes)
+		self.assertEqual(sct2.bin(), sct_bytes)
+		self.assertEqual([ci[0] for ci in sct2.chunk_index], [sctp.DATA, sctp.DATA])
+		self.assertEqual(len(sct2.chunks), 2)
+		self.assertIsNotNone(sct2.chunks[0][diameter.Diameter])
+		self.assertEqual(sct2.chunks[1].tsn, 1)
+		self.assertEqual(sct2.chunks[1].body_bytes, b"\x01\x02\x03")
+		self.assertEqual(sct2.padding, b"")
+		# length and padding are updated automatically
+		self.assertEqual(sct2.chunks[0].len, 16 + len(dia_bytes))
+		self.assertEqual(sct2.chunks[1].len, 19)
+		self.assertEqual(sct2.chunks[1].padding, b"\x00")
+		self.assertEqual(sct2.chunks[1].bin()[-4:], b"\x01\x02\x03\x00")
+		# changes in chunk payload update the checksum
+		sct2.chunks[0][diameter.Diameter].flags = 0x40
+		self.assertNotEqual(sct2.bin()[8:12], sct_bytes[8:12])
+
+		# raw bytes and tuples in chunks
+		chunk_bytes = sctp.Chunk(type=sctp.INIT, len=8, body_bytes=b"\x00\x01\x02\x03").bin()
+		sct = sctp.SCTP(chunks=[chunk_bytes])
+		self.assertEqual(sct.bin()[12:], chunk_bytes)
+		sct.chunks.append((sctp.INIT, chunk_bytes))
+		self.assertEqual(sct.bin()[12:], chunk_bytes * 2)
+		# bytes after the last chunk are only stored as padding
+		sct_bytes = sct.bin() + b"\x00\x00"
+		sct = sctp.SCTP(sct_bytes)
+		self.assertEqual(sct.padding, b"\x00\x00")
+		self.assertEqual(sct.body_bytes, b"")
+		self.assertEqual(sct.bin(), sct_bytes)
+
 
 class ReaderTestCase(unittest.TestCase):
 	def test_reader(self):
@@ -1306,6 +1531,181 @@ class ReaderTestCase(unittest.TestCase):
 
 		self.assertRaises(StopIteration, reader.__iter__().__next__)
 
+	def test_reader_index(self):
+		print_header("READER index")
+		import os
+		import shutil
+		import tempfile
+		dirname = tempfile.mkdtemp()
+
+		try:
+			fname = os.path.join(dirname, "packets_ether.pcap")
+			fname_index = fname + ppcap.INDEX_FILE_SUFFIX
+			shutil.copyfile("tests/packets_ether.pcap", fname)
+			reader = ppcap.Reader(filename=fname)
+			ts_bts_list = [(ts, bts) for ts, bts in reader]
+			# implicitly built index is only kept in memory
+			self.assertEqual(reader[0], ts_bts_list[0])
+			self.assertFalse(os.path.isfile(fname_index))
+			reader.reset()
+			reader.build_index(save=True)
+			self.assertTrue(os.path.isfile(fname_index))
+			reader.close()
+
+			for kwargs in [{}, {"use_mmap": True}, {"block_size": 100}]:
+				reader = ppcap.Reader(filename=fname, **kwargs)
+				# index gets loaded from sidecar file, no scanning needed
+				reader._scan_index = None
+				self.assertEqual(len(reader._get_index()[0]), 49)
+				self.assertEqual(reader[0], ts_bts_list[0])
+				self.assertEqual(reader[-1], ts_bts_list[-1])
+				self.assertEqual(reader[10:20:3], ts_bts_list[10:20:3])
+				self.assertRaises(IndexError, reader.__getitem__, 49)
+				reader.seek_packet(47)
+				self.assertEqual([(ts, bts) for ts, bts in reader], ts_bts_list[47:])
+				reader.seek_packet(5)
+				self.assertEqual(reader.get_by_indices([8, 3, 100]), [ts_bts_list[3], ts_bts_list[8]])
+				self.assertEqual(next(iter(reader)), ts_bts_list[5])
+				reader.close()
+
+			# outdated sidecar file gets ignored
+			os.utime(fname, ns=(0, 0))
+			reader = ppcap.Reader(filename=fname)
+			self.assertIsNone(reader._load_index(fname_index))
+			self.assertEqual(reader[-1], ts_bts_list[-1])
+			reader.close()
+
+			reader = ppcap.Reader(filename=fname, lowest_layer=ethernet.Ethernet)
+			self.assertEqual(reader[3][1].bin(), ts_bts_list[3][1])
+			reader.close()
+		finally:
+			shutil.rmtree(dirname)
+
+	def test_reader_time(self):
+		print_header("READER time")
+		reader = ppcap.Reader(filename="tests/packets_ether.pcap")
+		ts_bts_list = [(ts, bts) for ts, bts in reader]
+		timestamps = [ts for ts, _ in ts_bts_list]
+		self.assertEqual(timestamps, sorted(timestamps))
+
+		self.assertEqual(reader.seek_time(0), 0)
+		self.assertEqual(next(iter(reader)), ts_bts_list[0])
+		self.assertEqual(reader.seek_time(timestamps[20]), 20)
+		self.assertEqual([(ts, bts) for ts, bts in reader], ts_bts_list[20:])
+		self.assertEqual(reader.seek_time(timestamps[20] + 1), 21)
+		self.assertEqual(reader.seek_time(timestamps[-1] + 1), 49)
+		self.assertEqual([(ts, bts) for ts, bts in reader], [])
+
+		ts_bts_range = [(ts, bts) for ts, bts in reader.range(timestamps[10], timestamps[30])]
+		self.assertEqual(ts_bts_range, ts_bts_list[10:30])
+		self.assertEqual([(ts, bts) for ts, bts in reader.range(timestamps[-1] + 1, timestamps[-1] + 2)], [])
+		# only sparse checkpoints are kept, not the full index
+		self.assertIsNone(reader._index)
+		reader.close()
+
+		checkpoint_interval = ppcap.CHECKPOINT_INTERVAL
+		ppcap.CHECKPOINT_INTERVAL = 4
+
+		try:
+			for kwargs in [{}, {"use_mmap": True}, {"block_size": 100}]:
+				reader = ppcap.Reader(filename="tests/packets_ether.pcap", **kwargs)
+
+				for pos in [0, 3, 4, 5, 47, 48]:
+					self.assertEqual(reader.seek_time(timestamps[pos]), pos)
+					self.assertEqual(next(iter(reader)), ts_bts_list[pos])
+				self.assertEqual(len(reader._checkpoints[0]), 13)
+				self.assertEqual(list(reader.range(timestamps[3], timestamps[9])), ts_bts_list[3:9])
+				# checkpoints taken from the index
+				reader._checkpoints = None
+				reader.build_index()
+				self.assertEqual(reader.seek_time(timestamps[21]), 21)
+				self.assertEqual(next(iter(reader)), ts_bts_list[21])
+				reader.close()
+		finally:
+			ppcap.CHECKPOINT_INTERVAL = checkpoint_interval
+
+		reader = ppcap.Reader(filename="tests/packets_ether.pcap", ts_conversion=False)
+		ts_bts_range = list(reader.range(timestamps[10], timestamps[12]))
+		self.assertEqual([bts for _, bts in ts_bts_range], [bts for _, bts in ts_bts_list[10:12]])
+		self.assertEqual(type(ts_bts_range[0][0]), tuple)
+		reader.close()
+
+	def test_reader_block(self):
+		print_header("READER block mode")
+		reader = ppcap.Reader(filename="tests/packets_ether.pcap")
+		ts_bts_list = [(ts, bts) for ts, bts in reader]
+		reader.close()
+
+		# records spanning blocks and records bigger than a block
+		for block_size in [7, 16, 100, ppcap.BLOCK_SIZE_DEFAULT]:
+			reader = ppcap.Reader(filename="tests/packets_ether.pcap", block_size=block_size)
+			self.assertEqual([(ts, bts) for ts, bts in reader], ts_bts_list)
+			pkts = reader.get_by_indices([0, 17, 48])
+			self.assertEqual(pkts, [ts_bts_list[idx] for idx in [0, 17, 48]])
+			reader.reset()
+			self.assertEqual(len([ts for ts, bts in reader]), 49)
+			reader.close()
+
+	def test_reader_mmap(self):
+		print_header("READER mmap")
+		reader = ppcap.Reader(filename="tests/packets_ether.pcap")
+		ts_bts_list = [(ts, bts) for ts, bts in reader]
+		reader.close()
+
+		reader = ppcap.Reader(filename="tests/packets_ether.pcap", use_mmap=True)
+		ts_view_list = [(ts, view) for ts, view in reader]
+		self.assertEqual(len(ts_view_list), 49)
+		self.assertEqual(type(ts_view_list[0][1]), memoryview)
+		self.assertEqual(ts_view_list, ts_bts_list)
+		pkts = reader.get_by_indices([4, 5, 42, 100])
+		self.assertEqual([bytes(view) for _, view in pkts], [ts_bts_list[idx][1] for idx in [4, 5, 42]])
+		ts_view_list = None
+		pkts = None
+		reader.close()
+
+		reader = ppcap.Reader(filename="tests/packets_ether.pcap", use_mmap=True, lowest_layer=ethernet.Ethernet)
+		pkts = [pkt for ts, pkt in reader]
+		self.assertEqual([pkt.bin() for pkt in pkts], [bts for _, bts in ts_bts_list])
+		reader.close()
+
+	def test_reader_follow(self):
+		print_header("READER follow")
+		import os
+		import tempfile
+		import threading
+		fname = os.path.join(tempfile.mkdtemp(), "follow.pcap")
+		fh_write = open(fname, "wb")
+		writer = ppcap.Writer(fileobj=fh_write, buffer_size=0)
+		writer.write(b"\x00" * 10, ts=1)
+		# second record incomplete: header and half of data
+		record = struct.pack(">IIII", 0, 2, 10, 10) + b"\x01" * 10
+		fh_write.write(record[:21])
+		fh_write.flush()
+
+		reader = ppcap.Reader(filename=fname, follow=True)
+		self.assertEqual(reader.poll(), [(1, b"\x00" * 10)])
+		self.assertEqual(reader.poll(), [])
+		fh_write.write(record[21:])
+		fh_write.flush()
+		self.assertEqual(reader.poll(), [(2, b"\x01" * 10)])
+
+		def write_delayed():
+			for ts in range(3, 6):
+				time.sleep(0.02)
+				writer.write(b"\x02", ts=ts)
+				fh_write.flush()
+
+		thread = threading.Thread(target=write_delayed)
+		thread.start()
+		self.assertEqual([ts for ts, _ in reader.follow(timeout=0.5)], [3, 4, 5])
+		thread.join()
+		reader.close()
+		writer.close()
+
+		self.assertRaises(ValueError, ppcap.Reader, filename=fname, follow=True, use_mmap=True)
+		os.remove(fname)
+		os.rmdir(os.path.dirname(fname))
+
 
 class ReaderNgTestCase(unittest.TestCase):
 	def test_reader(self):
@@ -1405,6 +1805,132 @@ class ReaderPcapNgTestCase(unittest.TestCase):
 
 		self.assertEqual(count, 2)
 
+	def test_writer(self):
+		print_header("WRITER PCAP-NG File format")
+		import io
+		fh = io.BytesIO()
+		# keep content after close
+		fh.close = lambda: None
+		writer = pcapng.Writer(fileobj=fh, comment="test")
+		iface_id = writer.add_interface(linktype=ppcap.DLT_IEEE802_11_RADIO, ts_resolution_nano=False, name="wlan0")
+		self.assertEqual(iface_id, 1)
+		writer.write(b"\x00" * 5, ts=0x1122334455667788)
+		writer.write(b"\x01" * 4, ts=2000, interface_id=iface_id, comment="c", flags=pcapng.EPB_FLAGS_INBOUND)
+		writer.set_statistics(iface_id, ifdrop=3)
+		writer.close()
+		buf = fh.getvalue()
+
+		blocks = []
+		off = 0
+
+		while off < len(buf):
+			block_type, block_length = struct.unpack("<II", buf[off: off + 8])
+			self.assertEqual(block_length % 4, 0)
+			self.assertEqual(struct.unpack("<I", buf[off + block_length - 4: off + block_length])[0], block_length)
+			blocks.append((block_type, buf[off: off + block_length]))
+			off += block_length
+
+		self.assertEqual([block_type for block_type, _ in blocks], [pcapng.PCAPNG_SHB, pcapng.PCAPNG_IDB,
+			pcapng.PCAPNG_IDB, pcapng.PCAPNG_EPB, pcapng.PCAPNG_EPB, pcapng.PCAPNG_ISB, pcapng.PCAPNG_ISB])
+		shb = pcapng.SHB_LE(blocks[0][1])
+		self.assertEqual(shb.magic, pcapng.BE_MAGIC)
+		self.assertIn(b"\x01\x00\x04\x00test", blocks[0][1])
+		idb = pcapng.IDB_LE(blocks[2][1])
+		self.assertEqual(idb.linktype, ppcap.DLT_IEEE802_11_RADIO)
+		# if_tsresol: microseconds
+		self.assertIn(b"\x09\x00\x01\x00\x06", blocks[2][1])
+		epb = pcapng.EPB_LE(blocks[3][1])
+		self.assertEqual((epb.interface_id, epb.ts_high, epb.ts_low, epb.cap_len, epb.len),
+			(0, 0x11223344, 0x55667788, 5, 5))
+		self.assertEqual(blocks[3][1][28:36], b"\x00" * 5 + b"\x00" * 3)
+		epb = pcapng.EPB_LE(blocks[4][1])
+		self.assertEqual((epb.interface_id, epb.ts_high, epb.ts_low, epb.cap_len), (1, 0, 2, 4))
+		# comment, flags, end of options
+		self.assertEqual(blocks[4][1][28:32], b"\x01" * 4)
+		self.assertEqual(blocks[4][1][32:-4], b"\x01\x00\x01\x00c\x00\x00\x00\x02\x00\x04\x00\x01\x00\x00\x00" +
+			b"\x00" * 4)
+		isb = pcapng.ISB_LE(blocks[6][1])
+		self.assertEqual(isb.interface_id, 1)
+		# isb_ifdrop, isb_usrdeliv
+		self.assertIn(b"\x05\x00\x08\x00\x03" + b"\x00" * 7, blocks[6][1])
+		self.assertIn(b"\x08\x00\x08\x00\x01" + b"\x00" * 7, blocks[6][1])
+
+	def test_stream_reader(self):
+		print_header("STREAM READER PCAP-NG File format")
+		import io
+		import os
+		reader = pcapng.StreamReader(filename="tests/packets_ether2.pcapng")
+		packets = list(reader)
+		reader.close()
+		self.assertEqual([(ts, iface_id, len(bts)) for ts, iface_id, bts in packets],
+			[(1417779509722652000, 0, 90), (1417779509722675000, 1, 90)])
+		self.assertEqual(reader.sections, 1)
+		self.assertEqual([(iface.linktype, iface.ts_units) for iface in reader.interfaces], [(1, 1000000)] * 2)
+
+		fh = io.BytesIO()
+		fh.close = lambda: None
+		writer = pcapng.Writer(fileobj=fh)
+		writer.add_interface(ts_resolution_nano=False, name="eth1")
+		writer.write(b"\x00" * 3, ts=1000000123)
+		writer.write(b"\x01" * 5, ts=2000000456, interface_id=1, comment="c")
+		# simple packet block: original length 4
+		fh_spb = io.BytesIO()
+		fh_spb.write(struct.pack("<IIIB3xI", pcapng.PCAPNG_SPB, 20, 4, 2, 20))
+		# unknown block
+		fh_spb.write(struct.pack("<II4sI", 0x80000001, 16, b"abcd", 16))
+		writer.flush()
+		fh.write(fh_spb.getvalue())
+		writer.close()
+		# second section: big endian, timestamp resolution 2^-3 seconds, if_tsoffset 10 seconds
+		opts = struct.pack(">HHB3xHHqHH", pcapng.OPT_IDB_IF_TSRESOL, 1, 0x83, pcapng.OPT_IDB_IF_TSOFFSET, 8, 10, 0, 0)
+		fh.write(struct.pack(">IIIHHqI", pcapng.PCAPNG_SHB, 28, pcapng.BE_MAGIC, 1, 0, -1, 28))
+		fh.write(struct.pack(">IIHHI", pcapng.PCAPNG_IDB, 20 + len(opts), 228, 0, 0) + opts +
+			struct.pack(">I", 20 + len(opts)))
+		fh.write(struct.pack(">IIIIIII2sxxI", pcapng.PCAPNG_EPB, 36, 0, 0, 12, 2, 2, b"ab", 36))
+
+		# read from pipe: no seeking possible
+		fd_read, fd_write = os.pipe()
+		os.write(fd_write, fh.getvalue())
+		os.close(fd_write)
+		reader = pcapng.StreamReader(fileobj=os.fdopen(fd_read, "rb"))
+		packets = list(reader)
+		reader.close()
+		self.assertEqual(packets, [(1000000123, 0, b"\x00" * 3), (2000000000, 1, b"\x01" * 5), (None, 0, b"\x02\x00\x00\x00"),
+			(11500000000, 0, b"ab")])
+		self.assertEqual(reader.sections, 2)
+		self.assertEqual(reader.interfaces[0].linktype, 228)
+
+		reader = pcapng.StreamReader(filename="tests/packets_ether.pcap")
+		self.assertRaises(ValueError, list, reader)
+		reader.close()
+
+	def test_reader_raw(self):
+		print_header("READER PCAP-NG raw and lazy options")
+		import io
+		reader = pcapng.Reader(filename="tests/packets_ether2.pcapng", raw=True)
+		packets_raw = list(reader)
+		reader = pcapng.StreamReader(filename="tests/packets_ether2.pcapng")
+		self.assertEqual(packets_raw, [(ts, bts) for ts, _, bts in reader])
+		reader.close()
+
+		fh = io.BytesIO()
+		fh.close = lambda: None
+		writer = pcapng.Writer(fileobj=fh)
+		writer.write(b"\x00" * 3, ts=1000)
+		writer.write(b"\x01" * 4, ts=2000, comment="abc", flags=pcapng.EPB_FLAGS_OUTBOUND)
+		writer.close()
+		fh.seek(0)
+		reader = pcapng.Reader(fh)
+		epbs = [epb for _, epb in reader]
+		self.assertIsNone(epbs[1]._opts)
+		self.assertEqual(epbs[0].opts, [])
+		self.assertEqual(epbs[1].data, b"\x01" * 4)
+		self.assertEqual([(opt.code, opt.body_bytes) for opt in epbs[1].opts],
+			[(pcapng.OPT_COMMENT, b"abc"), (pcapng.OPT_EPB_FLAGS, b"\x02\x00\x00\x00")])
+		fh.seek(0)
+		reader = pcapng.Reader(fh, raw=True)
+		self.assertEqual(list(reader), [(1000, b"\x00" * 3), (2000, b"\x01" * 4)])
+
 
 class ReadWriteReadTestCase(unittest.TestCase):
 	def test_read_write(self):
@@ -1434,6 +1960,363 @@ class ReadWriteReadTestCase(unittest.TestCase):
 			self.assertEqual(bts, pkts_read[pos][1])
 		reader.close()
 
+	def test_read_write_many_raw(self):
+		print_header("pcap READ -> WRITE many/raw -> READ")
+		import os
+		import tempfile
+		filename_read = "tests/packets_ether.pcap"
+		filename_write = os.path.join(tempfile.mkdtemp(), "packets_ether.pcap")
+
+		with open(filename_read, "rb") as fh:
+			bts_file = fh.read()
+
+		# raw records: identical file using microsecond resolution
+		reader = ppcap.Reader(filename=filename_read)
+		ts_bts_list = [(ts, bts) for ts, bts in reader]
+		reader.reset()
+		writer = ppcap.Writer(filename=filename_write, reader=reader, buffer_size=100)
+
+		for record in reader.iter_raw():
+			writer.write_raw(record)
+		writer.close()
+
+		with open(filename_write, "rb") as fh:
+			self.assertEqual(fh.read(), bts_file)
+
+		# converted records, timestamps keep their resolution
+		reader.reset()
+		writer = ppcap.Writer(filename=filename_write, ts_resolution_nano=False)
+		writer.write_many(reader)
+		writer.close()
+		reader.close()
+
+		reader = ppcap.Reader(filename=filename_write)
+		self.assertEqual(reader.file_header.magic, ppcap.TCPDUMP_MAGIC)
+		self.assertEqual([(ts, bts) for ts, bts in reader], ts_bts_list)
+		reader.close()
+		os.remove(filename_write)
+		os.rmdir(os.path.dirname(filename_write))
+
+		# stopping iter_raw() early: reading continues after the last returned record
+		for use_mmap, block_size in [(False, None), (True, None), (False, 100)]:
+			reader = ppcap.Reader(filename=filename_read, use_mmap=use_mmap, block_size=block_size)
+
+			for idx, record in enumerate(reader.iter_raw()):
+				if idx == 2:
+					break
+			del record
+			self.assertEqual([(ts, bytes(bts)) for ts, bts in reader], ts_bts_list[3:])
+			reader.close()
+
+	def test_rotating_writer(self):
+		print_header("pcap rotating WRITE")
+		import os
+		import tempfile
+		dirname = tempfile.mkdtemp()
+		filenames_completed = []
+		writer = ppcap.RotatingWriter(os.path.join(dirname, "capture.pcap"), max_packets=10, max_files=3,
+			callback_completed=filenames_completed.append)
+
+		for cnt in range(45):
+			writer.write(b"\x00" * cnt, ts=cnt)
+		writer.close()
+
+		self.assertEqual(sorted(os.listdir(dirname)), ["capture_00002.pcap", "capture_00003.pcap", "capture_00004.pcap"])
+		self.assertEqual(filenames_completed, [os.path.join(dirname, "capture_%05d.pcap" % idx) for idx in range(5)])
+		reader = ppcap.Reader(filename=os.path.join(dirname, "capture_00004.pcap"))
+		self.assertEqual([(ts, len(bts)) for ts, bts in reader], [(cnt, cnt) for cnt in range(40, 45)])
+		reader.close()
+
+		# rotate by size
+		writer = ppcap.RotatingWriter(os.path.join(dirname, "size.pcap"), max_bytes=24 + 3 * (16 + 100))
+
+		for cnt in range(7):
+			writer.write(b"\x00" * 100)
+		writer.close()
+		filenames = ["size_00000.pcap", "size_00001.pcap", "size_00002.pcap"]
+		self.assertEqual([os.path.getsize(os.path.join(dirname, fname)) for fname in filenames], [372, 372, 140])
+
+		# compressed files keep their ".pcap.gz" suffix
+		writer = ppcap.RotatingWriter(os.path.join(dirname, "rz.pcap.gz"), max_packets=2)
+
+		for cnt in range(3):
+			writer.write(b"\x00" * cnt, ts=cnt)
+		writer.close()
+		self.assertTrue(os.path.isfile(os.path.join(dirname, "rz_00000.pcap.gz")))
+
+		with open(os.path.join(dirname, "rz_00001.pcap.gz"), "rb") as fh:
+			self.assertEqual(ppcap.get_compression(fh.read(6)), ppcap.COMPRESSION_GZIP)
+
+		for fname in os.listdir(dirname):
+			os.remove(os.path.join(dirname, fname))
+		os.rmdir(dirname)
+
+	def test_read_write_compressed(self):
+		print_header("pcap compressed READ/WRITE")
+		import gzip
+		import os
+		import tempfile
+		dirname = tempfile.mkdtemp()
+		reader = ppcap.Reader(filename="tests/packets_ether.pcap")
+		packets = list(reader)
+		reader.close()
+
+		for ext, magic in [("gz", b"\x1f\x8b"), ("xz", b"\xfd7zXZ\x00"), ("bz2", b"BZh")]:
+			fname = os.path.join(dirname, "packets.pcap." + ext)
+			writer = ppcap.Writer(filename=fname)
+			writer.write_many(packets)
+			writer.close()
+
+			with open(fname, "rb") as fh:
+				self.assertEqual(fh.read(len(magic)), magic)
+			self.assertEqual(ppcap.get_compression(magic), ext)
+			# compression is detected by magic, not by filename
+			os.rename(fname, fname + "_renamed")
+			reader = ppcap.Reader(filename=fname + "_renamed")
+			self.assertEqual(list(reader), packets)
+			reader.close()
+			self.assertRaises(ValueError, ppcap.Reader, filename=fname + "_renamed", use_mmap=True)
+			self.assertRaises(ValueError, ppcap.Reader, filename=fname + "_renamed", follow=True)
+			os.remove(fname + "_renamed")
+
+		# non seekable file object
+		fname = os.path.join(dirname, "packets.pcap")
+		writer = ppcap.Writer(filename=fname, compression=ppcap.COMPRESSION_GZIP)
+		writer.write_many(packets)
+		writer.close()
+		reader = ppcap.Reader(fileobj=gzip.open(fname))
+		self.assertEqual(list(reader), packets)
+		reader.close()
+		os.remove(fname)
+
+		# threaded and non threaded compressed files
+		fname = os.path.join(dirname, "data.xz")
+		fh = ppcap.open_compressed(fname, ppcap.COMPRESSION_XZ, "wb")
+		fh.write(b"\x00\x01" * 1000)
+		fh.close()
+
+		for threaded in [True, False]:
+			fh = ppcap.open_compressed(fname, ppcap.COMPRESSION_XZ, threaded=threaded)
+			self.assertEqual(fh.read(3), b"\x00\x01\x00")
+			self.assertEqual(fh.read(), b"\x01" + b"\x00\x01" * 998)
+			fh.close()
+		os.remove(fname)
+		os.rmdir(dirname)
+
+	def test_compression_module_missing(self):
+		print_header("pcap compression module missing")
+		import subprocess
+		import sys
+		# Python builds without _lzma and _bz2 can still import ppcap
+		code = "import sys; sys.modules['lzma'] = None; sys.modules['bz2'] = None; " \
+			"import pypacker.ppcap as ppcap; print(ppcap.get_compression_by_filename('a.pcap.xz'))"
+		out = subprocess.check_output([sys.executable, "-c", code])
+		self.assertEqual(out.strip(), b"xz")
+
+		# error only if the compression type is actually requested
+		lzma_orig = sys.modules.get("lzma")
+		sys.modules["lzma"] = None
+
+		try:
+			self.assertRaises(ImportError, ppcap.open_compressed, "a.pcap.xz", ppcap.COMPRESSION_XZ, threaded=False)
+		finally:
+			if lzma_orig is None:
+				del sys.modules["lzma"]
+			else:
+				sys.modules["lzma"] = lzma_orig
+		self.assertRaises(ValueError, ppcap.open_compressed, "a.pcap.zip", "zip", threaded=False)
+
+	def test_async_writer(self):
+		print_header("pcap async WRITE")
+		import os
+		import tempfile
+		import threading
+		fname = os.path.join(tempfile.mkdtemp(), "async.pcap")
+		writer = ppcap.AsyncWriter(ppcap.Writer(filename=fname), queue_size=16)
+
+		for cnt in range(100):
+			self.assertTrue(writer.write(b"\x00" * cnt, ts=cnt))
+		writer.close()
+		self.assertEqual(writer.written, 100)
+		self.assertEqual(writer.dropped, 0)
+		reader = ppcap.Reader(filename=fname)
+		self.assertEqual([(ts, len(bts)) for ts, bts in reader], [(cnt, cnt) for cnt in range(100)])
+		reader.close()
+		os.remove(fname)
+		os.rmdir(os.path.dirname(fname))
+
+		class StalledWriter(object):
+			def __init__(self):
+				self.event = threading.Event()
+				self.written = []
+
+			def write_many(self, ts_bts_iterable):
+				self.event.wait()
+				self.written.extend(ts_bts_iterable)
+
+			def flush(self):
+				pass
+
+			def close(self):
+				pass
+
+		for overflow, ts_expected in [(ppcap.OVERFLOW_DROP_NEWEST, [0, 1, 2, 3, 4]),
+			(ppcap.OVERFLOW_DROP_OLDEST, [0, 6, 7, 8, 9])]:
+			stalled = StalledWriter()
+			writer = ppcap.AsyncWriter(stalled, queue_size=4, overflow=overflow)
+			writer.write(b"", ts=0)
+
+			# wait until the first packet is taken by the writer thread
+			while writer.queue_depth > 0:
+				time.sleep(0.001)
+
+			for ts in range(1, 10):
+				writer.write(b"", ts=ts)
+			self.assertEqual(writer.queue_depth, 4)
+			self.assertEqual(writer.dropped, 5)
+			stalled.event.set()
+			writer.close()
+			self.assertEqual([ts for ts, _ in stalled.written], ts_expected)
+
+	def test_merge(self):
+		print_header("pcap MERGE")
+		import os
+		import tempfile
+		dirname = tempfile.mkdtemp()
+		filenames = [os.path.join(dirname, "merge%d.pcap" % idx) for idx in range(2)]
+
+		for idx, fname in enumerate(filenames):
+			writer = ppcap.Writer(filename=fname)
+			writer.write_many([(ts, b"\x00" * idx) for ts in range(idx, 20, 2)])
+			writer.close()
+
+		readers = [ppcap.Reader(filename=fname) for fname in filenames]
+		# pcapng like source: (timestamp_nanoseconds, interface id, bytes)
+		stream = [(5, 0, b"a"), (6, 1, b"b"), (100, 0, b"c")]
+		merged = list(ppcap.merge(readers[0], readers[1], stream, []))
+		self.assertEqual([ts for ts, _ in merged], sorted([ts for ts, _ in merged]))
+		self.assertEqual(len(merged), 23)
+		self.assertEqual(merged[:8], [(0, b""), (1, b"\x00"), (2, b""), (3, b"\x00"), (4, b""),
+			(5, b"\x00"), (5, b"a"), (6, b"")])
+		self.assertEqual(merged[-1], (100, b"c"))
+
+		for reader in readers:
+			reader.close()
+
+		fname_merged = os.path.join(dirname, "merged.pcap.gz")
+		ppcap.merge_files(filenames, fname_merged)
+		reader = ppcap.Reader(filename=fname_merged)
+		self.assertEqual([(ts, len(bts)) for ts, bts in reader], [(ts, ts % 2) for ts in range(20)])
+		self.assertEqual(reader.file_header.magic, ppcap.TCPDUMP_MAGIC_NANO)
+		reader.close()
+
+		ppcap.merge_files(filenames, fname_merged, ts_resolution_nano=False)
+		reader = ppcap.Reader(filename=fname_merged)
+		self.assertEqual(reader.file_header.magic, ppcap.TCPDUMP_MAGIC)
+		self.assertEqual([ts for ts, _ in reader], [0] * 20)
+		reader.close()
+
+		# linktypes have to match
+		fname_wlan = os.path.join(dirname, "wlan.pcap")
+		writer = ppcap.Writer(filename=fname_wlan, linktype=ppcap.DLT_IEEE802_11)
+		writer.close()
+		self.assertRaises(ValueError, ppcap.merge_files, filenames + [fname_wlan], fname_merged)
+
+		for fname in os.listdir(dirname):
+			os.remove(os.path.join(dirname, fname))
+		os.rmdir(dirname)
+
+
+class OpenCaptureTestCase(unittest.TestCase):
+	def test_open_capture(self):
+		print_header("open_capture")
+		import gzip
+		import os
+		import tempfile
+		import pypacker as pypacker_pkg
+		from pypacker import capture
+
+		for fname, fmt, linktype, clz in [("tests/packets_ether.pcap", capture.FORMAT_PCAP, ppcap.DLT_EN10MB, ethernet.Ethernet),
+			("tests/packets_ether2.pcapng", capture.FORMAT_PCAPNG, ppcap.DLT_EN10MB, ethernet.Ethernet),
+			("tests/packets_rtap_sel.pcap", capture.FORMAT_PCAP, ppcap.DLT_IEEE802_11_RADIO, radiotap.Radiotap),
+			("tests/packets_linuxcc.pcap", capture.FORMAT_PCAP, ppcap.DLT_LINUX_SLL, linuxcc.LinuxCC)]:
+			cap = pypacker_pkg.open_capture(fname)
+			packets = list(cap)
+			self.assertEqual(cap.format, fmt)
+			self.assertEqual(cap.linktype, linktype)
+			self.assertTrue(len(packets) > 0)
+			self.assertTrue(all(type(pkt) is clz for _, pkt in packets))
+			cap.close()
+
+		cap = pypacker_pkg.open_capture("tests/packets_ether.pcap", raw=True)
+		reader = ppcap.Reader(filename="tests/packets_ether.pcap")
+		self.assertEqual(list(cap), list(reader))
+		reader.close()
+		cap.close()
+
+		# the linktype is taken from the file header: only one Reader is created
+		readers = []
+		reader_orig = ppcap.Reader
+
+		class CountingReader(reader_orig):
+			def __init__(self, *args, **kwargs):
+				readers.append(kwargs)
+				reader_orig.__init__(self, *args, **kwargs)
+
+		ppcap.Reader = CountingReader
+
+		try:
+			cap = pypacker_pkg.open_capture("tests/packets_rtap_sel.pcap")
+			self.assertEqual(cap.linktype, ppcap.DLT_IEEE802_11_RADIO)
+			cap.close()
+		finally:
+			ppcap.Reader = reader_orig
+		self.assertEqual(len(readers), 1)
+		self.assertEqual(readers[0]["lowest_layer"], radiotap.Radiotap)
+
+		dirname = tempfile.mkdtemp()
+		# raw IP: IPv4 and IPv6, compressed pcapng
+		fname = os.path.join(dirname, "raw.pcapng")
+		writer = pcapng.Writer(filename=fname, linktype=ppcap.LINKTYPE_RAW)
+		writer.write(ip.IP(src_s="1.2.3.4").bin(), ts=1)
+		writer.write(ip6.IP6().bin(), ts=2)
+		writer.close()
+		fname_gz = os.path.join(dirname, "raw.pcapng.gz")
+
+		with open(fname, "rb") as fh, gzip.open(fname_gz, "wb") as fh_gz:
+			fh_gz.write(fh.read())
+		self.assertEqual(capture.get_format(fname_gz), (capture.FORMAT_PCAPNG, ppcap.COMPRESSION_GZIP))
+		cap = pypacker_pkg.open_capture(fname_gz)
+		self.assertEqual([(ts, type(pkt)) for ts, pkt in cap], [(1, ip.IP), (2, ip6.IP6)])
+		cap.close()
+		cap = pypacker_pkg.open_capture(fname, filter=lambda pkt: pkt.__class__ is ip.IP)
+		self.assertEqual([pkt.src_s for _, pkt in cap], ["1.2.3.4"])
+		cap.close()
+		# compressed pcap
+		fname_gz = os.path.join(dirname, "ether.pcap.gz")
+
+		with open("tests/packets_ether.pcap", "rb") as fh, gzip.open(fname_gz, "wb") as fh_gz:
+			fh_gz.write(fh.read())
+		cap = pypacker_pkg.open_capture(fname_gz)
+		self.assertEqual(cap.linktype, ppcap.DLT_EN10MB)
+		self.assertEqual(len([pkt for _, pkt in cap if type(pkt) is ethernet.Ethernet]), 49)
+		cap.close()
+
+		for fname in os.listdir(dirname):
+			os.remove(os.path.join(dirname, fname))
+		os.rmdir(dirname)
+		self.assertRaises(ValueError, pypacker_pkg.open_capture, "tests/test_pypacker.py")
+
+	def test_import_lightweight(self):
+		print_header("open_capture import")
+		import subprocess
+		import sys
+		# capture, ppcap and pcapng are only imported on calling open_capture()
+		code = "import sys; from pypacker.layer3 import ip; " \
+			"print(sorted(m for m in ('pypacker.capture', 'pypacker.ppcap', 'pypacker.pcapng') if m in sys.modules))"
+		out = subprocess.check_output([sys.executable, "-c", code])
+		self.assertEqual(out.strip(), b"[]")
+
 
 class RadiotapTestCase(unittest.TestCase):
 	def test_radiotap(self):
@@ -1465,6 +2348,16 @@ class RadiotapTestCase(unittest.TestCase):
 		self.assertNotEqual(rad.present_flags & radiotap.FLAGS_MASK, 0)
 		self.assertNotEqual(rad.present_flags & radiotap.RATE_MASK, 0)
 		# self.assertTrue(len(rad.fields) == 7)
+		# direct access via fields table
+		self.assertEqual(rad.channel_freq, 2412)
+		self.assertEqual(rad.channel_flags, 160)
+		self.assertEqual(rad.rate, 2)
+		self.assertEqual(rad.dbm_antsignal, -62)
+		self.assertIsNone(rad.tsft)
+		rad.present_flags |= radiotap.TSFT_MASK
+		rad.flags.insert(0, (radiotap.TSFT_MASK, b"\x01\x00\x00\x00\x00\x00\x00\x00"))
+		self.assertEqual(rad.tsft, 1)
+		self.assertEqual(rad.dbm_antsignal, -62)
 
 
 """
@@ -1712,6 +2605,21 @@ class IEEE80211TestCase(unittest.TestCase):
 		print("%04x" % beacon.capa)
 		self.assertEqual(beacon.seq_frag, 0x702D)
 		self.assertEqual(beacon.capa, 0x3104)
+		# IE index: no IE packets needed
+		self.assertEqual(beacon.ssid, b"system1")
+		self.assertEqual(beacon.channel, 1)
+		self.assertEqual(beacon.tim.period, 1)
+		self.assertEqual(type(beacon._params), list)
+		self.assertEqual(beacon.get_ie(ieee80211.IEEE80211.IE_RATES), b"\x82\x84\x8b\x96\x0c\x12\x18\x24")
+		self.assertEqual(beacon.get_ie(ieee80211.IE_ID_VENDOR, oui=b"\x00\x03\x7f"), b"\x00\x03\x7f\x01\x01\x00\x00\xff\x7f")
+		self.assertIsNone(beacon.get_ie(ieee80211.IEEE80211.IE_IBSS))
+		beacon.params[0] = ieee80211.IEEE80211.IE(id=0, len=4, body_bytes=b"test")
+		self.assertEqual(beacon.ssid, b"test")
+		# truncated TIM
+		beacon_hdr = beacon.header_bytes[:32]
+		self.assertIsNone(ieee80211.IEEE80211.Beacon(beacon_hdr + b"\x05\x04\x00\x01").tim)
+		self.assertIsNone(ieee80211.IEEE80211.Beacon(beacon_hdr + b"\x05\x02\x00\x01\x00\x00").tim)
+		self.assertEqual(ieee80211.IEEE80211.Beacon(beacon_hdr + b"\x05\x04\x00\x01\x00\x00").tim.period, 1)
 		# self.assertTrue(beacon.capa == 0x0431)
 		# TODO: test IEs
 		# self.assertTrue(ieee.capability.privacy == 1)
@@ -1779,6 +2687,10 @@ class IEEE80211TestCase(unittest.TestCase):
 		print("len: %d" % rtap_ieee.len)
 		self.assertEqual(rtap_ieee.len, 0x1200)		# 0x1200 = 18
 		self.assertEqual(rtap_ieee.present_flags, 0x2e480000)
+		self.assertEqual(radiotap.get_ieee80211_type_subtype(self.packet_bytes[0]), (ieee80211.MGMT_TYPE, ieee80211.M_BEACON))
+		self.assertEqual(rtap_ieee.ieee80211_type_subtype, (ieee80211.MGMT_TYPE, ieee80211.M_BEACON))
+		self.assertEqual(rtap_ieee.ieee80211.subtype, ieee80211.M_BEACON)
+		self.assertEqual(rtap_ieee.ieee80211_type_subtype, (ieee80211.MGMT_TYPE, ieee80211.M_BEACON))
 
 
 class DTPTestCase(unittest.TestCase):